@@ -14,3 +14,16 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Knowmore.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+from .assets import StaticAssetsMiddleware  # noqa: E402
+from .warmup import import_sdks_in_background  # noqa: E402
+
+import_sdks_in_background()
+
+application = StaticAssetsMiddleware(application)
+
+if settings.KNOWMORE_WARMUP:
+    from .warmup import WarmUpMiddleware
+
+    application = WarmUpMiddleware(application)
@@ -0,0 +1,292 @@
+"""
+Frontend asset layer for the Vite build in ``static/dist``.
+
+- ``FileCache`` keeps parsed build metadata (manifest, index.html) in memory
+  and reloads it only when the file's mtime changes.
+- ``precompress`` writes ``.gz`` (and ``.br`` when ``brotli`` is installed)
+  variants next to the built bundles. It runs from ``build_ui.sh``:
+
+      python -m Knowmore.assets [dist_dir]
+
+- ``StaticAssetsMiddleware`` serves ``/static/dist/`` straight from the ASGI
+  app with content negotiation, strong ETags, immutable cache headers for
+  hashed files and zero-copy sends where the server supports them.
+
+This module doesn't need Django settings so it can run at build time.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DIST_DIR = BASE_DIR / 'static' / 'dist'
+MANIFEST_PATH = DIST_DIR / '.vite' / 'manifest.json'
+INDEX_HTML_PATH = DIST_DIR / 'index.html'
+
+COMPRESSIBLE_SUFFIXES = {'.js', '.mjs', '.css', '.html', '.json', '.svg', '.map', '.txt', '.xml', '.webmanifest'}
+MIN_COMPRESS_SIZE = 1024
+# Encoding -> file suffix, in order of preference
+ENCODINGS = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+# Vite appends an 8 character content hash, e.g. index-BdQq_4o1.js
+HASHED_NAME_RE = re.compile(r'-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$')
+IMMUTABLE_CACHE_CONTROL = b'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = b'public, max-age=0, must-revalidate'
+CHUNK_SIZE = 64 * 1024
+
+
+class FileCache:
+    """Caches ``loader(path)`` and reloads it when the file's mtime or size changes"""
+
+    def __init__(self, path, loader):
+        self.path = path
+        self.loader = loader
+        self._key = None
+        self._value = None
+
+    def get(self):
+        """Return the cached value, raises ``FileNotFoundError`` if the file is missing"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._key = self._value = None
+            raise
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key != self._key:
+            self._value = self.loader(self.path)
+            self._key = key
+        return self._value
+
+
+def _load_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _parse_index_html(path):
+    """Extract the CSS and JS entry points from the Vite-generated index.html"""
+    with open(path, 'r') as f:
+        content = f.read()
+
+    css_match = re.search(r'href="([^"]*\.css)"', content)
+    js_match = re.search(r'src="([^"]*\.js)"', content)
+    return {
+        'css': css_match.group(1).replace('/static/', '') if css_match else None,
+        'js': js_match.group(1).replace('/static/', '') if js_match else None,
+    }
+
+
+vite_manifest = FileCache(MANIFEST_PATH, _load_json)
+vite_index = FileCache(INDEX_HTML_PATH, _parse_index_html)
+
+
+def get_entry_assets():
+    """Return the entry CSS/JS paths relative to ``/static/``"""
+    try:
+        entry = vite_manifest.get().get('index.html')
+    except FileNotFoundError:
+        entry = None
+
+    if entry:
+        css = entry.get('css') or []
+        return {
+            'css': f"dist/{css[0]}" if css else None,
+            'js': f"dist/{entry['file']}" if entry.get('file') else None,
+        }
+
+    try:
+        return vite_index.get()
+    except FileNotFoundError:
+        return {'css': None, 'js': None}
+
+
+def _write_variant(path, suffix, data):
+    variant = path.with_name(path.name + suffix)
+    if data is not None and len(data) < path.stat().st_size:
+        variant.write_bytes(data)
+        return True
+    # Not worth serving, drop any stale variant from a previous build
+    variant.unlink(missing_ok=True)
+    return False
+
+
+def precompress(dist_dir=DIST_DIR):
+    """Write gzip/brotli variants for every compressible file in ``dist_dir``"""
+    dist_dir = Path(dist_dir)
+    saved = 0
+    count = 0
+    for path in sorted(dist_dir.rglob('*')):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+        data = path.read_bytes()
+        if len(data) < MIN_COMPRESS_SIZE:
+            continue
+
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        br = brotli.compress(data, quality=11) if brotli is not None else None
+        for suffix, compressed in (('.gz', gz), ('.br', br)):
+            if _write_variant(path, suffix, compressed):
+                saved += len(data) - len(compressed)
+                count += 1
+    return count, saved
+
+
+class StaticAsset:
+    """A file plus its precompressed variants, with ETags derived from the content"""
+
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        self.content_type = (mimetypes.guess_type(path.name)[0] or 'application/octet-stream').encode()
+        self.immutable = bool(HASHED_NAME_RE.search(path.name))
+
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()[:32]
+        # encoding -> (path, size, etag)
+        self.variants = {None: (path, key[1], f'"{digest}"'.encode())}
+        for encoding, suffix in ENCODINGS.items():
+            variant = path.with_name(path.name + suffix)
+            try:
+                stat = variant.stat()
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime_ns >= key[0]:
+                self.variants[encoding] = (variant, stat.st_size, f'"{digest}-{encoding}"'.encode())
+
+    def choose(self, accept_encoding):
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in ENCODINGS:
+            if encoding in self.variants and accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return encoding
+        return None
+
+
+def parse_accept_encoding(header):
+    accepted = {}
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip().lower()] = q
+    return accepted
+
+
+class StaticAssetsMiddleware:
+    """ASGI wrapper serving the Vite build, everything else goes to ``app``"""
+
+    def __init__(self, app, prefix='/static/dist/', root=DIST_DIR):
+        self.app = app
+        self.prefix = prefix
+        self.root = Path(root).resolve()
+        self._assets = {}
+
+    def _resolve(self, relative_path):
+        path = (self.root / relative_path).resolve()
+        if self.root not in path.parents:
+            return None
+        try:
+            stat = path.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not path.is_file():
+            return None
+        return path, (stat.st_mtime_ns, stat.st_size)
+
+    async def _get_asset(self, relative_path):
+        resolved = self._resolve(relative_path)
+        if resolved is None:
+            self._assets.pop(relative_path, None)
+            return None
+        path, key = resolved
+
+        asset = self._assets.get(relative_path)
+        if asset is None or asset.key != key:
+            asset = await asyncio.to_thread(StaticAsset, path, key)
+            self._assets[relative_path] = asset
+        return asset
+
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] != 'http'
+                or scope['method'] not in ('GET', 'HEAD')
+                or not scope['path'].startswith(self.prefix)):
+            return await self.app(scope, receive, send)
+
+        asset = await self._get_asset(scope['path'][len(self.prefix):])
+        if asset is None:
+            return await self.app(scope, receive, send)
+
+        request_headers = dict(scope['headers'])
+        encoding = asset.choose(request_headers.get(b'accept-encoding', b'').decode('latin-1'))
+        path, size, etag = asset.variants[encoding]
+
+        headers = [
+            (b'etag', etag),
+            (b'cache-control', IMMUTABLE_CACHE_CONTROL if asset.immutable else REVALIDATE_CACHE_CONTROL),
+            (b'vary', b'Accept-Encoding'),
+        ]
+
+        if_none_match = request_headers.get(b'if-none-match')
+        if if_none_match is not None and (
+                if_none_match.strip() == b'*' or etag in [tag.strip() for tag in if_none_match.split(b',')]):
+            await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        headers += [
+            (b'content-type', asset.content_type),
+            (b'content-length', str(size).encode()),
+        ]
+        if encoding is not None:
+            headers.append((b'content-encoding', encoding.encode()))
+
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+        if scope['method'] == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        await self._send_file(scope, send, path)
+
+    async def _send_file(self, scope, send, path):
+        extensions = scope.get('extensions') or {}
+        if 'http.response.pathsend' in extensions:
+            await send({'type': 'http.response.pathsend', 'path': str(path)})
+            return
+
+        with open(path, 'rb') as f:
+            if 'http.response.zerocopysend' in extensions:
+                await send({'type': 'http.response.zerocopysend', 'file': f})
+                return
+
+            while True:
+                chunk = await asyncio.to_thread(f.read, CHUNK_SIZE)
+                more_body = len(chunk) == CHUNK_SIZE
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+                if not more_body:
+                    return
+
+
+if __name__ == '__main__':
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else DIST_DIR
+    variants, saved_bytes = precompress(target)
+    backends = 'gzip, brotli' if brotli is not None else 'gzip (install brotli for .br)'
+    print(f"Precompressed {variants} variants with {backends}, {saved_bytes / 1024:.1f} KiB saved")
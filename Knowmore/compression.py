@@ -0,0 +1,133 @@
+"""
+Streaming compression for ``/api/stream`` responses.
+
+The encoding is negotiated from ``Accept-Encoding`` (gzip, zstd, br, in the
+order of ``KNOWMORE_STREAM_COMPRESSION``). Each batch of frames that is
+ready at once is compressed and sync-flushed, so the client can decode every
+token as soon as it arrives while later frames still benefit from the
+shared compression window. ``brotli`` and ``zstandard`` are optional.
+"""
+
+import zlib
+from contextlib import aclosing
+
+import environ
+
+from .assets import parse_accept_encoding
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+env = environ.Env(
+    # Encodings offered, in order of preference, empty to disable. With a flush
+    # per frame gzip compresses best, see benchmarks/bench_stream_compression.py
+    KNOWMORE_STREAM_COMPRESSION=(list, ['gzip', 'zstd', 'br']),
+    KNOWMORE_STREAM_COMPRESSION_LEVELS=(dict, {}),
+    # Finished streams smaller than this are sent uncompressed, live ones never
+    # wait to find out
+    KNOWMORE_STREAM_COMPRESSION_MIN_BYTES=(int, 1024),
+)
+
+# Levels tuned for per-batch flushing, where cheap levels compress almost as well
+DEFAULT_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+
+
+class GzipStream:
+    encoding = 'gzip'
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliStream:
+    encoding = 'br'
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdStream:
+    encoding = 'zstd'
+
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+STREAMS = {'gzip': GzipStream}
+if brotli is not None:
+    STREAMS['br'] = BrotliStream
+if zstandard is not None:
+    STREAMS['zstd'] = ZstdStream
+
+
+def negotiate(accept_encoding, offered=None):
+    """First offered encoding the client accepts, ``None`` for identity"""
+    accepted = parse_accept_encoding(accept_encoding or '')
+    for encoding in env("KNOWMORE_STREAM_COMPRESSION") if offered is None else offered:
+        if encoding in STREAMS and accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def create_stream(encoding, level=None):
+    if level is None:
+        level = int(env("KNOWMORE_STREAM_COMPRESSION_LEVELS").get(encoding, DEFAULT_LEVELS[encoding]))
+    return STREAMS[encoding](level)
+
+
+async def compress_batches(batches, stream):
+    """Compress and flush each batch of frames, then end the compressed stream"""
+    async with aclosing(batches):
+        async for batch in batches:
+            chunk = stream.compress(b''.join(batch))
+            if chunk:
+                yield chunk
+    yield stream.finish()
+
+
+async def join_batches(batches):
+    async with aclosing(batches):
+        async for batch in batches:
+            yield b''.join(batch)
+
+
+def stream_body(batches, accept_encoding, known_size=None):
+    """
+    Body iterator and extra headers for frame ``batches``. Live streams are
+    compressed from the first frame, so their headers and first tokens go out
+    immediately. Only a ``known_size`` (a finished run being resumed) below
+    KNOWMORE_STREAM_COMPRESSION_MIN_BYTES is sent uncompressed, where the
+    encoding overhead would cost more than it saves.
+    """
+    encoding = negotiate(accept_encoding)
+    if encoding is None or (known_size is not None and known_size < env("KNOWMORE_STREAM_COMPRESSION_MIN_BYTES")):
+        return join_batches(batches), {'Vary': 'Accept-Encoding'}
+    return compress_batches(batches, create_stream(encoding)), {
+        'Content-Encoding': encoding,
+        'Vary': 'Accept-Encoding',
+    }
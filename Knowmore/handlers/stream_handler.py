@@ -1,24 +1,62 @@
-import json
+import logging
 import uuid
+from ..log import log_stage
+from ..protocol import DATA_STREAM
 from ..services.ai_provider import AIProviderFactory
+from ..services.model_router import model_stats
 from ..services.search_orchestrator import SearchOrchestrator
 
+logger = logging.getLogger(__name__)
 
-async def event_stream(messages, model, enable_web_search=True):
+
+async def event_stream(messages, model, enable_web_search=True, encoder=DATA_STREAM, routing=None, search_mode='pipeline'):
     """Simplified stream handler with SearchOrchestrator"""
     try:
+        # Report the routing decision so its latency effect can be measured client-side
+        if routing is not None:
+            yield encoder.data([{"type": "routing", **routing}])
+        
         # Early return for non-search requests
         if not enable_web_search:
             provider = AIProviderFactory.get_provider(model)
-            async for chunk in provider.stream_response(messages, model, enable_web_search=False):
-                yield chunk
+            stream = provider.stream_response(messages, model, enable_web_search=False, encoder=encoder)
+            with log_stage("generation"):
+                async for chunk in model_stats.measure(model, stream, encoder):
+                    yield chunk
+            logger.info("stream finished")
             return
         
         # Initialize search orchestrator
         search_orchestrator = SearchOrchestrator()
         
-        # Generate multiple search queries
-        search_queries = await search_orchestrator.generate_search_queries(messages)
+        # Tool mode: the model decides whether and what to search
+        if search_mode == 'tool':
+            provider = AIProviderFactory.get_provider(model)
+            stream = provider.stream_response(
+                messages, model, enable_web_search=True, encoder=encoder, search_orchestrator=search_orchestrator
+            )
+            # Includes the model's own searches, which run between its generation steps;
+            # the model stats only count the steps' text
+            with log_stage("generation"):
+                async for chunk in model_stats.measure(model, stream, encoder, steps=True):
+                    yield chunk
+            logger.info("stream finished")
+            return
+        
+        # Less search work under load, reported so its effect on quality can be tracked
+        level = search_orchestrator.apply_load_policy()
+        yield encoder.data([{"type": "searchLevel", **level}])
+        
+        # Follow-ups covered by an earlier turn's results skip query generation and search
+        reused_results = search_orchestrator.reusable_search_results(messages)
+        if reused_results is not None:
+            # Searches skipped, as many as this level would have run
+            yield encoder.data([{"type": "searchContext", "reused": True, "searches": level["queries"]}])
+            search_queries = []
+        else:
+            # Generate multiple search queries
+            with log_stage("query_generation"):
+                search_queries = await search_orchestrator.generate_search_queries(messages)
         
         if search_queries:
             # Generate tool call IDs for each query upfront
@@ -27,41 +65,53 @@ async def event_stream(messages, model, enable_web_search=True):
             # Stream search indicators for each query
             for i, (query, tool_call_id) in enumerate(zip(search_queries, tool_call_ids)):
                 # Stream search start indicator
-                yield f'b:{json.dumps({"toolCallId": tool_call_id, "toolName": "web_search"})}\n'
+                yield encoder.tool_call_start(tool_call_id, "web_search")
                 
                 # Stream search query and execution indicators
-                yield f'c:{json.dumps({"toolCallId": tool_call_id, "argsTextDelta": query})}\n'
-                yield f'9:{json.dumps({"toolCallId": tool_call_id, "toolName": "web_search", "args": {"query": query}})}\n'
+                yield encoder.tool_call_delta(tool_call_id, query)
+                yield encoder.tool_call(tool_call_id, "web_search", {"query": query})
             
             # Execute all searches concurrently
-            search_results_list = await search_orchestrator.execute_multiple_searches(search_queries)
+            with log_stage("search"):
+                search_results_list = await search_orchestrator.execute_multiple_searches(search_queries)
             
             # Stream search results for each search with matching tool call IDs
             for i, (search_results, tool_call_id) in enumerate(zip(search_results_list, tool_call_ids)):
-                yield f'a:{json.dumps({"toolCallId": tool_call_id, "result": search_results})}\n'
+                yield encoder.tool_result(tool_call_id, search_results)
+            
+            # Clean scraped pages off the event loop before building the context
+            with log_stage("cleaning"):
+                search_results_list = await search_orchestrator.clean_search_results(search_results_list)
+            search_orchestrator.remember_search_results(messages, search_results_list)
             
             # Enhance messages with all search contexts
             enhanced_messages = search_orchestrator.enhance_messages_with_multiple_searches(
                 messages, search_results_list
             )
+        elif reused_results is not None:
+            search_orchestrator.remember_search_results(messages, reused_results)
+            enhanced_messages = search_orchestrator.enhance_messages_with_multiple_searches(
+                messages, reused_results
+            )
         else:
             enhanced_messages = messages
         
         # Stream AI response
         provider = AIProviderFactory.get_provider(model)
-        async for chunk in provider.stream_response(enhanced_messages, model, enable_web_search=False):
-            yield chunk
+        stream = provider.stream_response(enhanced_messages, model, enable_web_search=False, encoder=encoder)
+        with log_stage("generation"):
+            async for chunk in model_stats.measure(model, stream, encoder):
+                yield chunk
+        logger.info("stream finished")
             
     except Exception as e:
         # Log the error and stream it
-        print(f"Error in event_stream: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        yield f'3:{json.dumps({"error": f"Stream error: {str(e)}"})}\n'
+        logger.exception("error in event_stream")
+        yield encoder.error(f"Stream error: {str(e)}")
 
 
 
 
-async def error_stream(message):
+async def error_stream(message, encoder=DATA_STREAM):
     """Generate error stream response using Vercel protocol"""
-    yield f'3:{json.dumps({"error": message})}\n'
\ No newline at end of file
+    yield encoder.error(message)
\ No newline at end of file
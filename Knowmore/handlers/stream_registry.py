@@ -0,0 +1,153 @@
+import asyncio
+import uuid
+from collections import deque
+
+import environ
+
+env = environ.Env(
+    KNOWMORE_STREAM_BUFFER_FRAMES=(int, 4096),
+    KNOWMORE_STREAM_GRACE_SECONDS=(float, 120),
+)
+
+
+class StreamRun:
+    """
+    One generation run. Frames go into a bounded ring buffer so clients can
+    reconnect at an offset (the number of frames they already received) and
+    get the missed frames followed by the live tail. The run keeps going
+    without subscribers and is dropped ``grace_seconds`` after the last one
+    leaves, cancelling generation if it hasn't finished by then.
+
+    The buffer holds the last ``max_frames`` frames only. A subscriber that
+    falls further behind than that, reconnecting late or reading too slowly
+    while still connected, gets a "resumed too late" error frame and
+    continues from the oldest frame still buffered.
+    """
+
+    def __init__(self, stream_id, encoder, max_frames, grace_seconds, on_expire):
+        self.id = stream_id
+        self.encoder = encoder
+        self.grace_seconds = grace_seconds
+        self.frames = deque(maxlen=max_frames)
+        self.next_offset = 0
+        self.done = False
+        self.subscribers = 0
+        self.task = None
+        self._on_expire = on_expire
+        self._new_frame = asyncio.Event()
+        self._expiry = None
+
+    def start(self, frames):
+        # Offset 0 tells the client which stream to resume
+        self._append(self.encoder.data([{"type": "stream", "streamId": self.id}]))
+        self.task = asyncio.get_running_loop().create_task(self._produce(frames))
+        self._schedule_expiry()
+
+    async def _produce(self, frames):
+        try:
+            async for frame in frames:
+                self._append(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._append(self.encoder.error(f"Stream error: {str(e)}"))
+        finally:
+            self.done = True
+            self._notify()
+
+    def _append(self, frame):
+        self.frames.append((self.next_offset, frame))
+        self.next_offset += 1
+        self._notify()
+
+    def _notify(self):
+        self._new_frame.set()
+        self._new_frame = asyncio.Event()
+
+    async def subscribe(self, offset=0):
+        """Yield frames from ``offset`` on, then follow the live stream until it ends"""
+        async for batch in self.subscribe_batches(offset):
+            for frame in batch:
+                yield frame
+
+    async def subscribe_batches(self, offset=0):
+        """Like ``subscribe``, but yields the frames that are ready at once as one list"""
+        self.subscribers += 1
+        self._cancel_expiry()
+        offset = max(0, min(offset, self.next_offset))
+        try:
+            while True:
+                new_frame = self._new_frame
+                batch = []
+                if self.frames:
+                    first_offset = self.frames[0][0]
+                    if offset < first_offset:
+                        batch.append(self.encoder.error("Stream resumed too late, some frames were dropped"))
+                        offset = first_offset
+                    # Index from the tail end, which a live subscriber is close to,
+                    # rather than copying or walking the whole buffer per frame
+                    for index in range(offset - first_offset, len(self.frames)):
+                        frame_offset, frame = self.frames[index]
+                        batch.append(self.encoder.with_id(frame, frame_offset))
+                        offset = frame_offset + 1
+                if batch:
+                    yield batch
+
+                if offset >= self.next_offset:
+                    if self.done:
+                        return
+                    await new_frame.wait()
+        finally:
+            self.subscribers -= 1
+            self._schedule_expiry()
+
+    def remaining_size(self, offset=0):
+        """Bytes still to send from ``offset`` once generation is done, ``None`` before that"""
+        if not self.done:
+            return None
+        return sum(len(frame) for frame_offset, frame in self.frames if frame_offset >= offset)
+
+    def _cancel_expiry(self):
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+
+    def _schedule_expiry(self):
+        if self.subscribers == 0:
+            self._cancel_expiry()
+            self._expiry = asyncio.get_running_loop().call_later(self.grace_seconds, self._expire)
+
+    def _expire(self):
+        if self.subscribers:
+            return
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        self._on_expire(self.id)
+
+
+class StreamRegistry:
+    """In-process registry of stream runs, reconnects must reach the same worker"""
+
+    def __init__(self, max_frames=4096, grace_seconds=120):
+        self.max_frames = max_frames
+        self.grace_seconds = grace_seconds
+        self.runs = {}
+
+    def start(self, frames, encoder, stream_id=None):
+        stream_id = stream_id or uuid.uuid4().hex
+        run = StreamRun(stream_id, encoder, self.max_frames, self.grace_seconds, self._remove)
+        self.runs[stream_id] = run
+        run.start(frames)
+        return run
+
+    def get(self, stream_id):
+        return self.runs.get(stream_id)
+
+    def _remove(self, stream_id):
+        self.runs.pop(stream_id, None)
+
+
+stream_registry = StreamRegistry(
+    max_frames=env("KNOWMORE_STREAM_BUFFER_FRAMES"),
+    grace_seconds=env("KNOWMORE_STREAM_GRACE_SECONDS"),
+)
@@ -0,0 +1,154 @@
+"""
+Non-blocking structured logging.
+
+Log calls on the event loop only enqueue the record: ``QueueingHandler``
+hands records to a ``QueueListener`` thread, which does the formatting
+(including tracebacks) and the writing. Records are tagged with the current
+request context (request ID, model, stage timings) from a ``ContextVar``,
+which asyncio tasks inherit, so background generation keeps its request's
+context.
+
+Configured from ``LOGGING`` in settings, see ``KNOWMORE_LOG_*`` there.
+"""
+
+import contextvars
+import json
+import logging
+import queue
+import sys
+import time
+import zlib
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+request_context = contextvars.ContextVar('knowmore_request_context', default=None)
+
+
+def bind_request(request_id, **fields):
+    """Start a new request context, returns the context dict"""
+    context = {"request_id": request_id, "timings": {}, **fields}
+    request_context.set(context)
+    return context
+
+
+def update_request(**fields):
+    context = request_context.get()
+    if context is not None:
+        context.update(fields)
+
+
+@contextmanager
+def log_stage(name):
+    """Record how long a stage of the current request took, in milliseconds"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        context = request_context.get()
+        if context is not None:
+            context["timings"][name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+class RequestContextFilter(logging.Filter):
+    """Copies the request context onto the record while still on the calling task"""
+
+    def filter(self, record):
+        context = request_context.get()
+        if context is not None:
+            for key, value in context.items():
+                if value is not None and not hasattr(record, key):
+                    setattr(record, key, dict(value) if key == "timings" else value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps ``rate`` of the records below WARNING. Sampling is per request, so a
+    sampled request logs all of its verbose records.
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        if self.rate <= 0:
+            return False
+        key = getattr(record, "request_id", None) or f"{record.created}"
+        return (zlib.crc32(str(key).encode()) % 10000) < self.rate * 10000
+
+
+# LogRecord attributes that aren't ``extra`` fields
+RESERVED = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {"message", "asctime"}
+
+
+def extra_fields(record):
+    return {key: value for key, value in record.__dict__.items() if key not in RESERVED and not key.startswith('_')}
+
+
+class TextFormatter(logging.Formatter):
+    """The usual one-line format, followed by the record's ``extra`` fields as ``key=value``"""
+
+    def formatMessage(self, record):
+        message = super().formatMessage(record)
+        for key, value in extra_fields(record).items():
+            # Plain words stay bare, anything else is JSON so it stays on one line
+            if not isinstance(value, str) or not value or any(c.isspace() or c in '"=' for c in value):
+                value = json.dumps(value, default=str, ensure_ascii=False)
+            message += f" {key}={value}"
+        return message
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the record's structured ``extra`` fields"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(extra_fields(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class QueueingHandler(QueueHandler):
+    """
+    Enqueues records for a background listener that writes them to ``stream``.
+    ``formatter`` set on this handler is used by the listener thread.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+        self._listening = True
+        self.dropped = 0
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread, not here
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block the caller, drop instead
+            self.dropped += 1
+
+    def close(self):
+        # Called again by logging.shutdown at exit
+        if self._listening:
+            self._listening = False
+            self.listener.stop()
+        super().close()
@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services.bulk_answer import BulkAnswerer
+
+
+class Command(BaseCommand):
+    help = (
+        "Answer a JSONL file of questions ({\"id\": ..., \"question\": ...} per line) "
+        "and write the answers to an output JSONL file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="JSONL file of questions")
+        parser.add_argument("output", help="JSONL file to write answers to")
+        parser.add_argument("--model", default="claude-3-5-haiku-latest")
+        parser.add_argument("--no-web-search", action="store_true", help="Answer without searching the web")
+        parser.add_argument("--concurrency", type=int, default=8, help="Parallel LLM calls")
+        parser.add_argument("--search-concurrency", type=int, default=4, help="Parallel Firecrawl searches")
+        parser.add_argument("--query-batch-size", type=int, default=10, help="Questions per query-generation call")
+        parser.add_argument("--no-batch-api", action="store_true", help="Use the streaming pool instead of the provider batch API")
+        parser.add_argument("--poll-interval", type=float, default=30, help="Seconds between batch status checks")
+
+    def handle(self, *args, **options):
+        questions = []
+        try:
+            with open(options["input"], "r") as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    if not item.get("question"):
+                        raise CommandError(f"Line {line_number} has no question")
+                    questions.append({"id": item.get("id", line_number), "question": item["question"]})
+        except (OSError, json.JSONDecodeError) as e:
+            raise CommandError(f"Could not read {options['input']}: {e}")
+
+        answerer = BulkAnswerer(
+            model=options["model"],
+            enable_web_search=not options["no_web_search"],
+            concurrency=options["concurrency"],
+            search_concurrency=options["search_concurrency"],
+            query_batch_size=options["query_batch_size"],
+            use_batch_api=not options["no_batch_api"],
+            poll_interval=options["poll_interval"],
+            write=lambda message: self.stderr.write(message),
+        )
+        with open(options["output"], "w") as output:
+            stats = asyncio.run(answerer.run(questions, output))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Answered {stats['answered']}/{stats['questions']} questions "
+            f"({stats['failed']} failed) in {stats['elapsed_seconds']}s, "
+            f"{stats['questions_per_second']} questions/s. "
+            f"Searches: {stats['searches_executed']} executed for {stats['searches_requested']} requested."
+        ))
@@ -0,0 +1,144 @@
+"""
+Frame encoders for the streaming chat API.
+
+Two wire formats are supported:
+
+- ``data``: the Vercel AI data-stream protocol (v1), one ``<code>:<json>\\n``
+  line per frame. This is what ``useChat`` in the UI consumes.
+- ``sse``: standard ``text/event-stream`` framing, one
+  ``data: {"type": ..., "value": ...}\\n\\n`` event per frame.
+
+Frames are returned as pre-encoded ``bytes`` so the response doesn't have to
+re-encode every chunk, and ``orjson`` is used for serialisation when it is
+installed.
+"""
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+if orjson is not None:
+    dumps = orjson.dumps
+    JSON_BACKEND = 'orjson'
+else:
+    import json
+
+    _json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def dumps(obj):
+        return _json_encoder.encode(obj).encode('utf-8')
+
+    JSON_BACKEND = 'json'
+
+
+# Frame kind -> data-stream type code
+DATA_STREAM_CODES = {
+    'text': b'0:',
+    'data': b'2:',
+    'error': b'3:',
+    'tool_call': b'9:',
+    'tool_result': b'a:',
+    'tool_call_start': b'b:',
+    'tool_call_delta': b'c:',
+    'finish_message': b'd:',
+    'finish_step': b'e:',
+}
+
+
+class FrameEncoder:
+    """Base encoder, subclasses implement ``encode(kind, payload)``"""
+    name = None
+    content_type = 'text/event-stream'
+    headers = {}
+
+    def encode(self, kind, payload):
+        raise NotImplementedError
+
+    def with_id(self, frame, offset):
+        """Tag an encoded frame with its stream offset, where the format supports it"""
+        return frame
+
+    def is_error(self, frame):
+        """Whether an encoded frame is an error frame"""
+        raise NotImplementedError
+
+    def is_text(self, frame):
+        """Whether an encoded frame is a text (answer token) frame"""
+        raise NotImplementedError
+
+    def text(self, text):
+        return self.encode('text', text)
+
+    def error(self, message):
+        return self.encode('error', {"error": message})
+
+    def finish(self, reason="stop"):
+        return self.encode('finish_message', {"finishReason": reason})
+
+    def finish_step(self, reason="stop"):
+        return self.encode('finish_step', {"finishReason": reason, "isContinued": False})
+
+    def tool_call_start(self, tool_call_id, tool_name):
+        return self.encode('tool_call_start', {"toolCallId": tool_call_id, "toolName": tool_name})
+
+    def tool_call_delta(self, tool_call_id, args_text_delta):
+        return self.encode('tool_call_delta', {"toolCallId": tool_call_id, "argsTextDelta": args_text_delta})
+
+    def tool_call(self, tool_call_id, tool_name, args):
+        return self.encode('tool_call', {"toolCallId": tool_call_id, "toolName": tool_name, "args": args})
+
+    def tool_result(self, tool_call_id, result):
+        return self.encode('tool_result', {"toolCallId": tool_call_id, "result": result})
+
+    def data(self, items):
+        return self.encode('data', items)
+
+
+class DataStreamEncoder(FrameEncoder):
+    """Vercel AI data-stream protocol v1"""
+    name = 'data'
+    headers = {'x-vercel-ai-data-stream': 'v1'}
+
+    def encode(self, kind, payload):
+        return DATA_STREAM_CODES[kind] + dumps(payload) + b'\n'
+
+    def is_error(self, frame):
+        return frame.startswith(DATA_STREAM_CODES['error'])
+
+    def is_text(self, frame):
+        return frame.startswith(DATA_STREAM_CODES['text'])
+
+
+class EventStreamEncoder(FrameEncoder):
+    """Plain text/event-stream ``data:`` events"""
+    name = 'sse'
+    headers = {'Cache-Control': 'no-cache'}
+
+    def encode(self, kind, payload):
+        if kind not in DATA_STREAM_CODES:
+            raise KeyError(kind)
+        return b'data: ' + dumps({"type": kind, "value": payload}) + b'\n\n'
+
+    def with_id(self, frame, offset):
+        return b'id: %d\n' % offset + frame
+
+    def is_error(self, frame):
+        return frame.startswith(b'data: {"type":"error"')
+
+    def is_text(self, frame):
+        return frame.startswith(b'data: {"type":"text"')
+
+
+DATA_STREAM = DataStreamEncoder()
+EVENT_STREAM = EventStreamEncoder()
+
+ENCODERS = {
+    DATA_STREAM.name: DATA_STREAM,
+    EVENT_STREAM.name: EVENT_STREAM,
+}
+
+
+def get_encoder(name=None):
+    """Return the encoder registered under ``name``, defaulting to the data stream"""
+    return ENCODERS.get(name or DATA_STREAM.name, DATA_STREAM)
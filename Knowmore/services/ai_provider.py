@@ -1,32 +1,39 @@
-from .claude_service import ClaudeService
-from .openai_service import OpenAIService
+from .model_router import ModelRouter
 
 
 class AIProviderFactory:
     @staticmethod
     def get_provider(model_name):
-        if model_name.startswith('claude'):
-            return ClaudeService()
-        elif model_name.startswith('gpt') or model_name.startswith('o4'):
+        # Provider modules pull in their SDKs, import them on first use
+        if model_name.startswith('gpt') or model_name.startswith('o4'):
+            from .openai_service import OpenAIService
             return OpenAIService()
         else:
             # Default to Claude
+            from .claude_service import ClaudeService
             return ClaudeService()
 
+    @staticmethod
+    def route(model_name, messages, enable_web_search=False):
+        """Pick the fastest supported model that qualifies for the request, see ModelRouter"""
+        return ModelRouter(AIProviderFactory.get_supported_models()).route(
+            model_name, messages, enable_web_search=enable_web_search
+        )
+
     @staticmethod
     def get_supported_models():
         return {
             'claude': [
-                {'id': 'claude-opus-4-20250514', 'name': 'Claude Opus 4'},
-                {'id': 'claude-sonnet-4-20250514', 'name': 'Claude Sonnet 4'},
-                {'id': 'claude-3-7-sonnet-20250219', 'name': 'Claude Sonnet 3.7'},
-                {'id': 'claude-3-5-sonnet-latest', 'name': 'Claude Sonnet 3.5'},
-                {'id': 'claude-3-5-haiku-latest', 'name': 'Claude Haiku 3.5'},
-                {'id': 'claude-3-5-sonnet-20240620', 'name': 'Claude Sonnet 3.5'}
+                {'id': 'claude-opus-4-20250514', 'name': 'Claude Opus 4', 'tier': 3},
+                {'id': 'claude-sonnet-4-20250514', 'name': 'Claude Sonnet 4', 'tier': 3},
+                {'id': 'claude-3-7-sonnet-20250219', 'name': 'Claude Sonnet 3.7', 'tier': 2},
+                {'id': 'claude-3-5-sonnet-latest', 'name': 'Claude Sonnet 3.5', 'tier': 2},
+                {'id': 'claude-3-5-haiku-latest', 'name': 'Claude Haiku 3.5', 'tier': 1},
+                {'id': 'claude-3-5-sonnet-20240620', 'name': 'Claude Sonnet 3.5', 'tier': 2}
             ],
             'openai': [
-                {'id': 'gpt-4o-2024-08-06', 'name': 'GPT-4o'},
-                {'id': 'o4-mini-2025-04-16', 'name': 'O4 Mini'},
-                {'id': 'gpt-4.1-2025-04-14', 'name': 'GPT-4.1'}
+                {'id': 'gpt-4o-2024-08-06', 'name': 'GPT-4o', 'tier': 2},
+                {'id': 'o4-mini-2025-04-16', 'name': 'O4 Mini', 'tier': 2},
+                {'id': 'gpt-4.1-2025-04-14', 'name': 'GPT-4.1', 'tier': 3}
             ]
         }
\ No newline at end of file
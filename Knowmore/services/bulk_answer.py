@@ -0,0 +1,188 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+from .ai_provider import AIProviderFactory
+from .search_orchestrator import SearchOrchestrator
+
+
+def _normalise_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class Progress:
+    """Prints ``done/total`` and throughput for a stage, at most every ``interval`` seconds"""
+
+    def __init__(self, stage, total, write=print, interval=2.0):
+        self.stage = stage
+        self.total = total
+        self.write = write
+        self.interval = interval
+        self.done = 0
+        self.start = time.perf_counter()
+        self._last = 0.0
+
+    def advance(self, count=1):
+        self.done += count
+        now = time.perf_counter()
+        if self.done >= self.total or now - self._last >= self.interval:
+            self._last = now
+            self.write(f"[{self.stage}] {self.done}/{self.total} ({self.rate():.1f}/s)")
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.start
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+
+class BulkAnswerer:
+    """
+    Answers a list of questions offline: batched query generation, searches
+    deduplicated across the whole batch, and answers through the provider's
+    batch API or a concurrency-limited pool.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        enable_web_search: bool = True,
+        concurrency: int = 8,
+        search_concurrency: int = 4,
+        query_batch_size: int = 10,
+        use_batch_api: bool = True,
+        poll_interval: float = 30,
+        write=print,
+    ):
+        self.model = model
+        self.enable_web_search = enable_web_search
+        self.concurrency = concurrency
+        self.search_concurrency = search_concurrency
+        self.query_batch_size = query_batch_size
+        self.use_batch_api = use_batch_api
+        self.poll_interval = poll_interval
+        self.write = write
+        self.stats = {
+            "questions": 0,
+            "answered": 0,
+            "failed": 0,
+            "searches_requested": 0,
+            "searches_executed": 0,
+        }
+
+    async def generate_queries(self, orchestrator: SearchOrchestrator, questions: List[str]) -> List[List[str]]:
+        batches = [
+            questions[i:i + self.query_batch_size]
+            for i in range(0, len(questions), self.query_batch_size)
+        ]
+        progress = Progress("queries", len(questions), self.write)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(batch):
+            async with semaphore:
+                queries = await orchestrator.generate_search_queries_batch(batch)
+            progress.advance(len(batch))
+            return queries
+
+        results = await asyncio.gather(*(run(batch) for batch in batches))
+        return [queries for batch_queries in results for queries in batch_queries]
+
+    async def run_searches(self, orchestrator: SearchOrchestrator, queries_per_question: List[List[str]]) -> Dict[str, Any]:
+        """Execute every distinct query once, keyed by its normalised form"""
+        unique = {}
+        for queries in queries_per_question:
+            for query in queries:
+                self.stats["searches_requested"] += 1
+                unique.setdefault(_normalise_query(query), query)
+        self.stats["searches_executed"] = len(unique)
+
+        progress = Progress("searches", len(unique), self.write)
+        semaphore = asyncio.Semaphore(self.search_concurrency)
+
+        async def run(key, query):
+            async with semaphore:
+                result = await orchestrator.execute_search(query)
+            progress.advance()
+            return key, result
+
+        return dict(await asyncio.gather(*(run(key, query) for key, query in unique.items())))
+
+    async def build_messages(self, orchestrator, question, queries, search_results) -> List[Dict[str, Any]]:
+        messages = [{"role": "user", "content": question}]
+        results_list = [search_results[_normalise_query(q)] for q in queries if _normalise_query(q) in search_results]
+        if not results_list:
+            return messages
+        results_list = await orchestrator.clean_search_results(results_list)
+        return orchestrator.enhance_messages_with_multiple_searches(messages, results_list)
+
+    async def answer_with_batch_api(self, provider, requests, on_answer):
+        async for custom_id, text, error in provider.batch_complete(
+            requests, model=self.model, poll_interval=self.poll_interval
+        ):
+            on_answer(custom_id, text, error)
+
+    async def answer_with_pool(self, provider, requests, on_answer):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(custom_id, messages):
+            async with semaphore:
+                try:
+                    return custom_id, await provider.complete(messages, model=self.model), None
+                except Exception as e:
+                    return custom_id, None, str(e)
+
+        for task in asyncio.as_completed([run(cid, msgs) for cid, msgs in requests.items()]):
+            on_answer(*(await task))
+
+    async def run(self, questions: List[Dict[str, Any]], output) -> Dict[str, Any]:
+        """Answer ``questions`` (dicts with ``id`` and ``question``), writing JSONL lines to ``output``"""
+        start = time.perf_counter()
+        self.stats["questions"] = len(questions)
+        texts = [q["question"] for q in questions]
+
+        orchestrator = SearchOrchestrator()
+        if self.enable_web_search:
+            queries_per_question = await self.generate_queries(orchestrator, texts)
+            search_results = await self.run_searches(orchestrator, queries_per_question)
+        else:
+            queries_per_question = [[] for _ in questions]
+            search_results = {}
+
+        # Batch APIs restrict custom ids, index by position instead of the user's id
+        messages_list = await asyncio.gather(*(
+            self.build_messages(orchestrator, text, queries, search_results)
+            for text, queries in zip(texts, queries_per_question)
+        ))
+        requests = {f"q{index}": messages for index, messages in enumerate(messages_list)}
+
+        progress = Progress("answers", len(questions), self.write)
+
+        def on_answer(custom_id, text, error):
+            index = int(custom_id[1:])
+            queries = queries_per_question[index]
+            sources = []
+            for query in queries:
+                result = search_results.get(_normalise_query(query)) or {}
+                sources += [r.get("url") for r in result.get("results", [])[:3] if r.get("url")]
+            output.write(json.dumps({
+                "id": questions[index]["id"],
+                "question": texts[index],
+                "model": self.model,
+                "answer": text,
+                "error": error,
+                "queries": queries,
+                "sources": list(dict.fromkeys(sources)),
+            }) + "\n")
+            output.flush()
+            self.stats["answered" if error is None else "failed"] += 1
+            progress.advance()
+
+        provider = AIProviderFactory.get_provider(self.model)
+        if self.use_batch_api and hasattr(provider, "batch_complete"):
+            await self.answer_with_batch_api(provider, requests, on_answer)
+        else:
+            await self.answer_with_pool(provider, requests, on_answer)
+
+        elapsed = time.perf_counter() - start
+        self.stats["elapsed_seconds"] = round(elapsed, 2)
+        self.stats["questions_per_second"] = round(len(questions) / elapsed, 3) if elapsed > 0 else None
+        return self.stats
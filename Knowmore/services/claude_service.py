@@ -1,50 +1,206 @@
-import json
+import asyncio
 import environ
-from anthropic import AsyncAnthropic
+
+from ..protocol import DATA_STREAM
+from .client_cache import LoopLocalClient
 
 env = environ.Env(
     ANTHROPIC_API_KEY=str,
 )
 
+
+def _create_client():
+    # The SDK is slow to import, load it on first use
+    from anthropic import AsyncAnthropic
+    return AsyncAnthropic(
+        api_key=env("ANTHROPIC_API_KEY"),
+    )
+
+
+shared_client = LoopLocalClient(_create_client)
+
+
+def _on_content_block_delta(event, encoder):
+    text = getattr(event.delta, 'text', None)
+    if text is not None:
+        return encoder.text(text)
+
+
+def _on_content_block_start(event, encoder):
+    # Handle initial text content
+    content_block = getattr(event, 'content_block', None)
+    if getattr(content_block, 'type', None) == 'text' and getattr(content_block, 'text', None):
+        return encoder.text(content_block.text)
+
+
+def _on_message_stop(event, encoder):
+    return encoder.finish("stop")
+
+
+def _on_untyped(event, encoder):
+    # Fallback for text content
+    text = getattr(event, 'text', None)
+    if text is not None:
+        return encoder.text(text)
+
+
+# Claude stream event type -> frame builder
+EVENT_HANDLERS = {
+    'content_block_delta': _on_content_block_delta,
+    'content_block_start': _on_content_block_start,
+    'message_stop': _on_message_stop,
+    None: _on_untyped,
+}
+
+
+def _on_tool_block_start(event, encoder, tool_ids):
+    block = event.content_block
+    if getattr(block, 'type', None) == 'tool_use':
+        tool_ids[event.index] = block.id
+        return encoder.tool_call_start(block.id, block.name)
+    return _on_content_block_start(event, encoder)
+
+
+def _on_tool_block_delta(event, encoder, tool_ids):
+    partial_json = getattr(event.delta, 'partial_json', None)
+    if partial_json:
+        return encoder.tool_call_delta(tool_ids[event.index], partial_json)
+    return _on_content_block_delta(event, encoder)
+
+
+# Event handlers for tool-calling mode, message_stop is handled once the step's final message is known
+TOOL_EVENT_HANDLERS = {
+    'content_block_start': _on_tool_block_start,
+    'content_block_delta': _on_tool_block_delta,
+}
+
+
 class ClaudeService:
     def __init__(self):
-        self.client = AsyncAnthropic(
-            api_key=env("ANTHROPIC_API_KEY"),
-        )
+        self.client = shared_client.get()
+
+    async def stream_response(self, messages, model="claude-3-5-sonnet-20240620", enable_web_search=False, encoder=DATA_STREAM, search_orchestrator=None):
+        if search_orchestrator is not None:
+            async for frame in self._stream_with_search_tool(messages, model, encoder, search_orchestrator):
+                yield frame
+            return
 
-    async def stream_response(self, messages, model="claude-3-5-sonnet-20240620", enable_web_search=False):
         stream_params = {
             "max_tokens": 1024,
             "messages": messages,
             "model": model,
         }
+        handlers = EVENT_HANDLERS
         
         try:
             async with self.client.messages.stream(**stream_params) as stream:
                 async for event in stream:
-                    # Handle different event types from Claude's streaming
-                    if hasattr(event, 'type'):
-                        if event.type == 'content_block_delta':
-                            if hasattr(event.delta, 'text'):
-                                # Stream text using Vercel protocol
-                                yield f'0:{json.dumps(event.delta.text)}\n'
-                        
-                        elif event.type == 'content_block_start':
-                            # Handle initial text content
-                            if hasattr(event, 'content_block') and hasattr(event.content_block, 'type'):
-                                if event.content_block.type == 'text' and hasattr(event.content_block, 'text'):
-                                    if event.content_block.text:
-                                        yield f'0:{json.dumps(event.content_block.text)}\n'
-                        
-                        elif event.type == 'message_stop':
-                            # Send message finish with d: identifier
-                            yield f'd:{json.dumps({"finishReason": "stop"})}\n'
-                    
-                    else:
-                        # Fallback for text content
-                        if hasattr(event, 'text'):
-                            yield f'0:{json.dumps(event.text)}\n'
+                    handler = handlers.get(getattr(event, 'type', None))
+                    if handler is None:
+                        continue
+                    frame = handler(event, encoder)
+                    if frame is not None:
+                        yield frame
         
         except Exception as e:
             # Send error using 3: identifier
-            yield f'3:{json.dumps({"error": str(e)})}\n'
\ No newline at end of file
+            yield encoder.error(str(e))
+
+
+    async def _stream_with_search_tool(self, messages, model, encoder, search_orchestrator):
+        """Let the model decide whether and what to search through native tool calling"""
+        tool = search_orchestrator.get_tool_definition()
+        stream_params = {
+            "max_tokens": 1024,
+            "model": model,
+            "tools": [{"name": tool["name"], "description": tool["description"], "input_schema": tool["parameters"]}],
+        }
+        conversation = list(messages)
+        max_steps = search_orchestrator.max_search_steps
+        handlers = TOOL_EVENT_HANDLERS
+
+        try:
+            for step in range(max_steps + 1):
+                # Out of search rounds, the model has to answer with what it has
+                tool_choice = {"type": "auto"} if step < max_steps else {"type": "none"}
+                tool_ids = {}
+                async with self.client.messages.stream(
+                    messages=conversation, tool_choice=tool_choice, **stream_params
+                ) as stream:
+                    async for event in stream:
+                        handler = handlers.get(getattr(event, 'type', None))
+                        if handler is None:
+                            continue
+                        frame = handler(event, encoder, tool_ids)
+                        if frame is not None:
+                            yield frame
+                    message = await stream.get_final_message()
+
+                tool_uses = [block for block in message.content if block.type == 'tool_use']
+                if message.stop_reason != 'tool_use' or not tool_uses:
+                    yield encoder.finish("stop")
+                    return
+
+                for block in tool_uses:
+                    yield encoder.tool_call(block.id, block.name, block.input)
+                results = await search_orchestrator.run_tool_calls(
+                    [{"id": block.id, "name": block.name, "args": block.input} for block in tool_uses]
+                )
+                for result in results:
+                    yield encoder.tool_result(result["id"], result["result"])
+                yield encoder.finish_step("tool-calls")
+
+                conversation.append({
+                    "role": "assistant",
+                    "content": [
+                        {"type": "text", "text": block.text} if block.type == 'text'
+                        else {"type": "tool_use", "id": block.id, "name": block.name, "input": block.input}
+                        for block in message.content
+                        if block.type in ('text', 'tool_use') and (block.type != 'text' or block.text)
+                    ],
+                })
+                conversation.append({
+                    "role": "user",
+                    "content": [
+                        {"type": "tool_result", "tool_use_id": result["id"], "content": result["content"]}
+                        for result in results
+                    ],
+                })
+
+        except Exception as e:
+            # Send error using 3: identifier
+            yield encoder.error(str(e))
+
+    async def complete(self, messages, model="claude-3-5-sonnet-20240620", max_tokens=1024):
+        """Non-streaming completion, returns the response text"""
+        response = await self.client.messages.create(
+            max_tokens=max_tokens,
+            messages=messages,
+            model=model,
+        )
+        return "".join(block.text for block in response.content if getattr(block, 'type', None) == 'text')
+
+    async def batch_complete(self, requests, model="claude-3-5-sonnet-20240620", max_tokens=1024, poll_interval=30):
+        """
+        Run ``{custom_id: messages}`` through the Message Batches API.
+        Yields ``(custom_id, text, error)`` once the batch has ended.
+        """
+        batch = await self.client.messages.batches.create(requests=[
+            {
+                "custom_id": custom_id,
+                "params": {"max_tokens": max_tokens, "messages": messages, "model": model},
+            }
+            for custom_id, messages in requests.items()
+        ])
+        while batch.processing_status != "ended":
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.messages.batches.retrieve(batch.id)
+
+        async for entry in await self.client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                content = entry.result.message.content
+                text = "".join(block.text for block in content if getattr(block, 'type', None) == 'text')
+                yield entry.custom_id, text, None
+            else:
+                error = getattr(entry.result, 'error', None)
+                yield entry.custom_id, None, str(error) if error else entry.result.type
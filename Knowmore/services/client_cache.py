@@ -0,0 +1,25 @@
+import asyncio
+import weakref
+
+
+class LoopLocalClient:
+    """
+    Keeps one SDK client per event loop so its connection pool is reused
+    across requests. The async SDK clients hold connections bound to the loop
+    they were opened on, so callers without a running loop get a fresh client.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._clients = weakref.WeakKeyDictionary()
+
+    def get(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.factory()
+
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self.factory()
+        return client
@@ -0,0 +1,216 @@
+import asyncio
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+import environ
+
+env = environ.Env(
+    KNOWMORE_CONTENT_CLEANER=(bool, True),
+    KNOWMORE_CONTENT_CLEANER_WORKERS=(int, 2),
+)
+
+# Link text and URLs may hold one level of brackets ("[[1]](#note)"); not allowing more keeps
+# the scan linear on lines full of "[" instead of quadratic
+IMAGE_RE = re.compile(r'!\[(?:[^\[\]]|\[[^\[\]]*\])*\]\((?:[^()]|\([^()]*\))*\)')
+LINK_RE = re.compile(r'\[((?:[^\[\]]|\[[^\[\]]*\])*)\]\((?:[^()]|\([^()]*\))*\)')
+REFERENCE_RE = re.compile(r'^\s*\[[^\]]+\]:\s*\S+.*$')
+BARE_URL_RE = re.compile(r'<?https?://\S+>?')
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+LIST_MARKER_RE = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s*')
+WHITESPACE_RE = re.compile(r'[ \t ]+')
+WORD_RE = re.compile(r'\w')
+# Whole lines of site chrome. Anchored so headings and sentences that merely
+# mention "sign up" or "subscribe" survive.
+BOILERPLATE_PHRASE = (
+    r'cookie (?:policy|settings|preferences)|accept(?: all)?(?: cookies)?|reject all|privacy policy|'
+    r'terms (?:of (?:use|service)|and conditions)|'
+    r'sign in|sign up|log in|log out|subscribe(?: now| to (?:our|the) newsletter)?|newsletter|'
+    r'skip to (?:main )?content|share(?: (?:on|this)(?: \w+)?)?|follow us(?: on \w+)?|advertisement|back to top'
+)
+BOILERPLATE_RE = re.compile(
+    rf'^\W*(?:{BOILERPLATE_PHRASE})(?:\s*[|·•/,]\s*(?:{BOILERPLATE_PHRASE}))*\W*$',
+    re.IGNORECASE,
+)
+COOKIE_BANNER_RE = re.compile(r'^\W*(?:we|this (?:web)?site) uses? cookies\b', re.IGNORECASE)
+# Footers: "© 2025 Example Inc." or "Copyright 2025 Example Inc. All rights reserved."
+COPYRIGHT_SIGN_RE = re.compile(r'^\W*(?:©|\(c\)\s*(?:19|20)\d\d\b)', re.IGNORECASE)
+YEAR_RE = re.compile(r'\b(?:19|20)\d\d\b')
+ALL_RIGHTS_RESERVED_RE = re.compile(r'\ball rights reserved\b', re.IGNORECASE)
+# Only lines shorter than this are checked for boilerplate, which also bounds the regex work
+BOILERPLATE_MAX_LEN = 200
+# Lines that are mostly link text are navigation
+NAV_LINK_RATIO = 0.8
+
+PASSAGE_MAX_CHARS = 600
+MAX_PASSAGES = 8
+
+
+def _is_boilerplate(text: str) -> bool:
+    if len(text) >= BOILERPLATE_MAX_LEN:
+        return False
+    if BOILERPLATE_RE.match(text) or COOKIE_BANNER_RE.match(text) or COPYRIGHT_SIGN_RE.match(text):
+        return True
+    return bool(YEAR_RE.search(text) and ALL_RIGHTS_RESERVED_RE.search(text))
+
+
+def _clean_line(line: str) -> Optional[str]:
+    """Return the cleaned line, or ``None`` if it is noise"""
+    if REFERENCE_RE.match(line):
+        return None
+
+    line = IMAGE_RE.sub('', line)
+    links = LINK_RE.findall(line)
+    text = LINK_RE.sub(r'\1', line)
+    text = BARE_URL_RE.sub('', text)
+    text = HTML_TAG_RE.sub('', text)
+    text = WHITESPACE_RE.sub(' ', text).strip()
+
+    if not WORD_RE.search(text):
+        return None
+    if links:
+        link_chars = sum(len(link.strip()) for link in links)
+        body = LIST_MARKER_RE.sub('', text)
+        if body and link_chars / len(body) >= NAV_LINK_RATIO:
+            return None
+    if _is_boilerplate(text):
+        return None
+    return text
+
+
+def clean_markdown(markdown: str) -> str:
+    """Strip images, links, navigation, boilerplate and repeated lines from scraped markdown"""
+    lines = []
+    seen = set()
+    blank = True
+    for raw_line in markdown.splitlines():
+        if not raw_line.strip():
+            if not blank:
+                lines.append('')
+                blank = True
+            continue
+
+        line = _clean_line(raw_line)
+        if line is None:
+            continue
+        key = line.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+        blank = False
+
+    return '\n'.join(lines).strip()
+
+
+def _split_long(paragraph: str, max_chars: int) -> List[str]:
+    """Cut a paragraph at word boundaries into pieces of up to ``max_chars``"""
+    pieces = []
+    while len(paragraph) > max_chars:
+        cut = paragraph.rfind(' ', 0, max_chars)
+        cut = cut if cut > 0 else max_chars
+        pieces.append(paragraph[:cut].strip())
+        paragraph = paragraph[cut:].strip()
+    if paragraph:
+        pieces.append(paragraph)
+    return pieces
+
+
+def split_passages(text: str, max_chars: int = PASSAGE_MAX_CHARS) -> List[str]:
+    """Group paragraphs into passages of up to ``max_chars``, starting a new one at headings"""
+    passages = []
+    current = []
+    size = 0
+    for paragraph in text.split('\n\n'):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        is_heading = paragraph.startswith('#')
+        for piece in ([paragraph] if is_heading else _split_long(paragraph, max_chars)):
+            # Keep a heading together with the text that follows it
+            heading_only = len(current) == 1 and current[0].startswith('#')
+            if current and (is_heading or (size + len(piece) > max_chars and not heading_only)):
+                passages.append('\n'.join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece)
+    if current:
+        passages.append('\n'.join(current))
+
+    # Drop passages that are only a heading
+    return [p for p in passages if not (p.startswith('#') and '\n' not in p)]
+
+
+def clean_pages(pages: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Process pool entry point, takes and returns small plain dicts"""
+    cleaned = []
+    for page in pages:
+        markdown = page.get('markdown') or ''
+        text = clean_markdown(markdown)
+        passages = split_passages(text)
+        kept = passages[:MAX_PASSAGES]
+        cleaned.append({
+            'url': page.get('url', ''),
+            'passages': kept,
+            'original_chars': len(markdown),
+            # Before and after the MAX_PASSAGES cut
+            'cleaned_chars': sum(len(p) for p in passages),
+            'kept_chars': sum(len(p) for p in kept),
+        })
+    return cleaned
+
+
+class ContentCleaner:
+    """Runs ``clean_pages`` in a bounded process pool so it never blocks the event loop"""
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, forking a threaded server process isn't safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self._executor
+
+    async def clean(self, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not pages:
+            return []
+        # Only ship what the workers need across the process boundary
+        payload = [{'url': p.get('url', ''), 'markdown': p.get('markdown') or ''} for p in pages]
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), clean_pages, payload)
+        except BrokenProcessPool:
+            # A worker died, start a fresh pool for the next call
+            self.shutdown()
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_content_cleaner = None
+_content_cleaner_lock = threading.Lock()
+
+
+def get_content_cleaner() -> Optional[ContentCleaner]:
+    """Process-wide cleaner, ``None`` when disabled with KNOWMORE_CONTENT_CLEANER=false"""
+    global _content_cleaner
+    if not env("KNOWMORE_CONTENT_CLEANER"):
+        return None
+    with _content_cleaner_lock:
+        if _content_cleaner is None:
+            _content_cleaner = ContentCleaner(env("KNOWMORE_CONTENT_CLEANER_WORKERS"))
+    return _content_cleaner
@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import environ
+
+from .page_index import STOPWORDS, TOKEN_RE
+from .search_policy import LEVELS
+
+env = environ.Env(
+    KNOWMORE_CONTEXT_REUSE=(bool, True),
+    KNOWMORE_CONTEXT_REUSE_CONVERSATIONS=(int, 1024),
+    KNOWMORE_CONTEXT_REUSE_TTL_SECONDS=(float, 1800),
+    # Share of the question's terms the kept context must contain to be reused
+    KNOWMORE_CONTEXT_REUSE_MIN_COVERAGE=(float, 0.6),
+)
+
+logger = logging.getLogger(__name__)
+
+# Words that refer back to the conversation rather than name a topic
+FOLLOW_UP_WORDS = {
+    'about', 'again', 'also', 'any', 'can', 'could', 'detail', 'details', 'do', 'does', 'elaborate',
+    'else', 'explain', 'first', 'go', 'he', 'her', 'him', 'his', 'i', 'last', 'like', 'me', 'mean',
+    'more', 'one', 'ones', 'other', 'please', 'second', 'she', 'so', 'some', 'summarize', 'summarise',
+    'tell', 'than', 'their', 'them', 'then', 'there', 'these', 'they', 'third', 'those', 'thing',
+    'things', 'us', 'we', 'would', 'you', 'your',
+}
+# Search result sets kept per conversation, newest first
+MAX_RESULT_SETS = 6
+# Pages and content kept per result set: the most build_search_context uses at any level,
+# plus a character so it still knows the content was cut
+KEPT_RESULTS = max(level["results"] for level in LEVELS)
+KEPT_CONTENT_CHARS = max(level["contentChars"] for level in LEVELS) + 1
+
+
+def conversation_key(messages: List[Dict[str, Any]]) -> str:
+    digest = hashlib.sha1()
+    for msg in messages:
+        digest.update(f"{msg.get('role')}\0{msg.get('content') or ''}\0".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def question_terms(text: str) -> List[str]:
+    return list(dict.fromkeys(
+        term for term in TOKEN_RE.findall(text.lower())
+        if term not in STOPWORDS and term not in FOLLOW_UP_WORDS and (len(term) > 1 or term.isdigit())
+    ))
+
+
+def context_terms(results_list: List[Dict[str, Any]]) -> set:
+    parts = []
+    for search_result in results_list:
+        parts.append(search_result.get("query") or "")
+        for result in search_result.get("results", []):
+            parts += [result.get("title") or "", result.get("description") or "",
+                      result.get("content") or result.get("markdown") or ""]
+    return set(TOKEN_RE.findall(" ".join(parts).lower()))
+
+
+def slim_results(search_result: Dict[str, Any]) -> Dict[str, Any]:
+    """``search_result`` with only what answering from it needs, raw markdown dropped"""
+    results = []
+    for result in search_result.get("results", [])[:KEPT_RESULTS]:
+        content = result.get("content") or result.get("markdown") or result.get("description") or ""
+        results.append({
+            "url": result.get("url", ""),
+            "title": result.get("title", ""),
+            "description": result.get("description", ""),
+            "content": content[:KEPT_CONTENT_CHARS],
+        })
+    return {"query": search_result.get("query", ""), "results": results}
+
+
+class ConversationContexts:
+    """
+    Search results of recent turns, keyed by a hash of the conversation up to
+    the user message they were retrieved for. Clients post back the plain
+    messages, so a follow-up finds the previous turn's results under its
+    conversation prefix and can answer from them instead of searching again.
+    In-process, like the stream registry.
+    """
+
+    def __init__(self, max_conversations: int = 1024, ttl_seconds: float = 1800, min_coverage: float = 0.6):
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        self.min_coverage = min_coverage
+        self._entries = OrderedDict()
+        self.stats = {
+            "turns": 0,
+            "reused": 0,
+            "searched": 0,
+            "searches_avoided": 0,
+        }
+
+    def previous(self, messages: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Context of this turn (a regenerated answer) or of the previous user turn"""
+        user_indexes = [i for i, msg in enumerate(messages) if msg.get('role') == 'user']
+        prefixes = [messages] + ([messages[:user_indexes[-2] + 1]] if len(user_indexes) > 1 else [])
+        now = time.time()
+        for prefix in prefixes:
+            key = conversation_key(prefix)
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            if now - entry["at"] > self.ttl_seconds:
+                del self._entries[key]
+                continue
+            self._entries.move_to_end(key)
+            return entry
+        return None
+
+    def covers(self, question: str, entry: Dict[str, Any]) -> bool:
+        terms = question_terms(question)
+        if not terms:
+            # Purely referential ("tell me more about the second one")
+            return True
+        return sum(term in entry["terms"] for term in terms) / len(terms) >= self.min_coverage
+
+    def reusable(self, messages: List[Dict[str, Any]], question: str, searches: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Kept search results that cover ``question``, ``None`` when a new search
+        is needed. ``searches`` is how many the turn would run otherwise.
+        """
+        self.stats["turns"] += 1
+        entry = self.previous(messages)
+        if entry is None or not self.covers(question, entry):
+            self.stats["searched"] += 1
+            return None
+        self.stats["reused"] += 1
+        self.stats["searches_avoided"] += searches
+        logger.info("search context reused", extra={
+            "result_sets": len(entry["results"]),
+            "searches_avoided": searches,
+            "totals": dict(self.stats),
+        })
+        return entry["results"]
+
+    def remember(self, messages: List[Dict[str, Any]], results_list: List[Dict[str, Any]]):
+        """Keep ``results_list`` for this turn, after any still-fresh results of earlier turns"""
+        previous = self.previous(messages)
+        queries = {result.get("query") for result in results_list}
+        kept = [slim_results(result) for result in results_list if result.get("results")]
+        if previous is not None:
+            kept += [result for result in previous["results"] if result.get("query") not in queries]
+        if not kept:
+            return
+        kept = kept[:MAX_RESULT_SETS]
+        key = conversation_key(messages)
+        self._entries[key] = {"results": kept, "terms": context_terms(kept), "at": time.time()}
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_conversations:
+            self._entries.popitem(last=False)
+
+
+_conversation_contexts = None
+
+
+def get_conversation_contexts() -> Optional[ConversationContexts]:
+    """Process-wide store, ``None`` when disabled with KNOWMORE_CONTEXT_REUSE=false"""
+    global _conversation_contexts
+    if not env("KNOWMORE_CONTEXT_REUSE"):
+        return None
+    if _conversation_contexts is None:
+        _conversation_contexts = ConversationContexts(
+            max_conversations=env("KNOWMORE_CONTEXT_REUSE_CONVERSATIONS"),
+            ttl_seconds=env("KNOWMORE_CONTEXT_REUSE_TTL_SECONDS"),
+            min_coverage=env("KNOWMORE_CONTEXT_REUSE_MIN_COVERAGE"),
+        )
+    return _conversation_contexts
@@ -0,0 +1,195 @@
+import re
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import environ
+
+env = environ.Env(
+    KNOWMORE_MODEL_ROUTING=(bool, False),
+)
+
+# Capability tier required by a request
+LIGHT, STANDARD, HEAVY = 1, 2, 3
+
+# Used until a model has measurements of its own
+PRIOR_TTFT = {LIGHT: 0.5, STANDARD: 0.8, HEAVY: 1.2}
+PRIOR_TOKENS_PER_SECOND = {LIGHT: 120.0, STANDARD: 70.0, HEAVY: 50.0}
+EXPECTED_OUTPUT_TOKENS = {LIGHT: 250, STANDARD: 500, HEAVY: 800}
+
+STATS_WINDOW = 50
+# Rough bytes per token of data-stream text frames, JSON framing included
+BYTES_PER_TOKEN = 5
+
+HEAVY_RE = re.compile(
+    r'```|\b(?:code|implement|debug|refactor|prove|derive|analy[sz]e|compare|design|architecture|'
+    r'step[- ]by[- ]step|explain why|trade-?offs?|write (?:an? )?(?:essay|article|report|program|function|script))\b',
+    re.IGNORECASE,
+)
+LIGHT_RE = re.compile(
+    r'^\s*(?:thanks?|thank you|ok(?:ay)?|cool|great|nice|yes|no|sure|hi|hello|hey|got it)\b',
+    re.IGNORECASE,
+)
+FACTUAL_RE = re.compile(
+    r'^\s*(?:what|who|when|where|which|is|are|was|were|does|do|did|can|how (?:much|many|old|long|far))\b',
+    re.IGNORECASE,
+)
+
+
+class ModelStats:
+    """Rolling time-to-first-token and tokens-per-second measurements per model"""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self.window = window
+        self._ttft = {}
+        self._tps = {}
+        # Stream outcomes across all models, True for a failed stream
+        self._failures = deque(maxlen=window)
+
+    def record(self, model: str, ttft: float, tokens: float, generation_seconds: float):
+        self._ttft.setdefault(model, deque(maxlen=self.window)).append(ttft)
+        if tokens > 0 and generation_seconds > 0:
+            self._tps.setdefault(model, deque(maxlen=self.window)).append(tokens / generation_seconds)
+
+    def ttft(self, model: str) -> Optional[float]:
+        samples = self._ttft.get(model)
+        return sum(samples) / len(samples) if samples else None
+
+    def tokens_per_second(self, model: str) -> Optional[float]:
+        samples = self._tps.get(model)
+        return sum(samples) / len(samples) if samples else None
+
+    def error_rate(self) -> float:
+        """Share of recent streams, any model, that ended in an error frame"""
+        return sum(self._failures) / len(self._failures) if self._failures else 0.0
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            model: {
+                "ttft": self.ttft(model),
+                "tokensPerSecond": self.tokens_per_second(model),
+                "samples": len(self._ttft[model]),
+            }
+            for model in self._ttft
+        }
+
+    async def measure(self, model: str, stream, encoder=None, steps: bool = False):
+        """
+        Pass frames through while timing the first frame and the generation rate.
+        With ``encoder``, streams ending in an error frame count as failures instead.
+        With ``steps`` (tool calling, needs ``encoder``) the rate counts only text
+        frames, over runs of consecutive ones, so the searches between generation
+        steps and their result frames stay out of it.
+        """
+        start = time.perf_counter()
+        first = None
+        size = 0
+        failed = False
+        generation_seconds = 0.0
+        # Arrival of the previous frame, while it was a text frame
+        last_text = None
+        async for chunk in stream:
+            now = time.perf_counter()
+            if first is None:
+                first = now
+            if encoder is not None and encoder.is_error(chunk):
+                failed = True
+            if not steps:
+                size += len(chunk)
+            elif encoder.is_text(chunk):
+                if last_text is not None:
+                    size += len(chunk)
+                    generation_seconds += now - last_text
+                last_text = now
+            else:
+                last_text = None
+            yield chunk
+        if encoder is not None:
+            self._failures.append(failed)
+        if first is not None and not failed:
+            if not steps:
+                generation_seconds = time.perf_counter() - first
+            self.record(model, first - start, size / BYTES_PER_TOKEN, generation_seconds)
+
+
+model_stats = ModelStats()
+
+
+def classify_request(messages: List[Dict[str, Any]], enable_web_search: bool = False) -> Dict[str, Any]:
+    """Decide locally how capable a model the latest user message needs"""
+    last_message = ""
+    for msg in reversed(messages):
+        if msg.get('role') == 'user':
+            last_message = msg.get('content', '') or ''
+            break
+    length = len(last_message)
+    follow_up = len(messages) > 1
+
+    if HEAVY_RE.search(last_message) or length > 1500:
+        return {"tier": HEAVY, "reason": "complex request"}
+    if LIGHT_RE.match(last_message) and length < 80:
+        return {"tier": LIGHT, "reason": "acknowledgement"}
+    if follow_up and length < 40:
+        return {"tier": LIGHT, "reason": "short follow-up"}
+    # With search on the model mostly summarises the retrieved context
+    factual_limit = 400 if enable_web_search else 200
+    if FACTUAL_RE.match(last_message) and length < factual_limit:
+        return {"tier": LIGHT, "reason": "factual question"}
+    return {"tier": STANDARD, "reason": "general question"}
+
+
+class ModelRouter:
+    """Picks the fastest model of the requested provider that qualifies for a request"""
+
+    def __init__(self, models_by_provider: Dict[str, List[Dict[str, Any]]], stats: ModelStats = model_stats):
+        self.models_by_provider = models_by_provider
+        self.stats = stats
+
+    def _find(self, model_name: str):
+        for provider, models in self.models_by_provider.items():
+            for model in models:
+                if model['id'] == model_name:
+                    return provider, model
+        return None, None
+
+    def expected_latency(self, model: Dict[str, Any], tier: int) -> float:
+        ttft = self.stats.ttft(model['id'])
+        tps = self.stats.tokens_per_second(model['id'])
+        ttft = PRIOR_TTFT[model['tier']] if ttft is None else ttft
+        tps = PRIOR_TOKENS_PER_SECOND[model['tier']] if tps is None else tps
+        return ttft + EXPECTED_OUTPUT_TOKENS[tier] / tps
+
+    def route(self, model_name: str, messages: List[Dict[str, Any]], enable_web_search: bool = False) -> Dict[str, Any]:
+        profile = classify_request(messages, enable_web_search)
+        provider, requested = self._find(model_name)
+        decision = {
+            "requested": model_name,
+            "model": model_name,
+            "tier": profile["tier"],
+            "reason": profile["reason"],
+            "expectedLatency": None,
+        }
+        if requested is None:
+            decision["reason"] = "unknown model, not routed"
+            return decision
+
+        # Never route to a more capable (slower, pricier) model than requested
+        required = min(profile["tier"], requested['tier'])
+        candidates = [
+            model for model in self.models_by_provider[provider]
+            if required <= model['tier'] <= requested['tier']
+        ]
+        # Ties go to the model the client asked for
+        best = min(candidates, key=lambda model: (
+            self.expected_latency(model, profile["tier"]), model['id'] != model_name
+        ))
+        decision["model"] = best['id']
+        decision["expectedLatency"] = round(self.expected_latency(best, profile["tier"]), 3)
+        return decision
+
+
+def routing_enabled(requested: Optional[str] = None) -> bool:
+    """Per-request ``routing`` value wins over KNOWMORE_MODEL_ROUTING"""
+    if requested is not None:
+        return requested == 'auto'
+    return env("KNOWMORE_MODEL_ROUTING")
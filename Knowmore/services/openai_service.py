@@ -1,19 +1,37 @@
+import asyncio
 import json
 import environ
-from openai import AsyncOpenAI
+
+from ..protocol import DATA_STREAM
+from .client_cache import LoopLocalClient
 
 env = environ.Env(
     OPENAI_API_KEY=str,
 )
 
+
+def _create_client():
+    # The SDK is slow to import, load it on first use
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(
+        api_key=env("OPENAI_API_KEY"),
+    )
+
+
+shared_client = LoopLocalClient(_create_client)
+
+
 class OpenAIService:
     def __init__(self):
-        self.client = AsyncOpenAI(
-            api_key=env("OPENAI_API_KEY"),
-        )
+        self.client = shared_client.get()
+
+    async def stream_response(self, messages, model="gpt-3.5-turbo", enable_web_search=False, encoder=DATA_STREAM, search_orchestrator=None):
+        """Stream chat completion response, with the web search tool when a search orchestrator is given"""
+        if search_orchestrator is not None:
+            async for frame in self._stream_with_search_tool(messages, model, encoder, search_orchestrator):
+                yield frame
+            return
 
-    async def stream_response(self, messages, model="gpt-3.5-turbo", enable_web_search=False):
-        """Stream chat completion response without tool support"""
         try:
             stream_params = {
                 "model": model,
@@ -30,12 +48,160 @@ class OpenAIService:
                 
                 # Handle regular text content
                 if delta.content is not None:
-                    yield f'0:{json.dumps(delta.content)}\n'
+                    yield encoder.text(delta.content)
                 
                 # Handle completion
                 if choice.finish_reason is not None:
-                    yield f'd:{json.dumps({"finishReason": choice.finish_reason})}\n'
+                    yield encoder.finish(choice.finish_reason)
                     
         except Exception as e:
             # Send error using 3: identifier
-            yield f'3:{json.dumps({"error": str(e)})}\n'
\ No newline at end of file
+            yield encoder.error(str(e))
+
+    async def _stream_with_search_tool(self, messages, model, encoder, search_orchestrator):
+        """Let the model decide whether and what to search through native tool calling"""
+        tool = search_orchestrator.get_tool_definition()
+        tools = [{"type": "function", "function": tool}]
+        conversation = list(messages)
+        max_steps = search_orchestrator.max_search_steps
+
+        try:
+            for step in range(max_steps + 1):
+                # Out of search rounds, the model has to answer with what it has
+                stream = await self.client.chat.completions.create(
+                    model=model,
+                    messages=conversation,
+                    stream=True,
+                    max_tokens=1024,
+                    tools=tools,
+                    tool_choice="auto" if step < max_steps else "none",
+                )
+
+                text = ""
+                # index -> {"id", "name", "arguments"}
+                tool_calls = {}
+                finish_reason = None
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    delta = choice.delta
+
+                    if delta.content is not None:
+                        text += delta.content
+                        yield encoder.text(delta.content)
+
+                    for tool_call_delta in delta.tool_calls or []:
+                        function = tool_call_delta.function
+                        call = tool_calls.get(tool_call_delta.index)
+                        if call is None:
+                            call = tool_calls[tool_call_delta.index] = {
+                                "id": tool_call_delta.id,
+                                "name": function.name if function is not None else None,
+                                "arguments": "",
+                            }
+                            yield encoder.tool_call_start(call["id"], call["name"])
+                        arguments = function.arguments if function is not None else None
+                        if arguments:
+                            call["arguments"] += arguments
+                            yield encoder.tool_call_delta(call["id"], arguments)
+
+                    if choice.finish_reason is not None:
+                        finish_reason = choice.finish_reason
+
+                if finish_reason != "tool_calls" or not tool_calls:
+                    yield encoder.finish(finish_reason or "stop")
+                    return
+
+                calls = []
+                for call in tool_calls.values():
+                    try:
+                        args = json.loads(call["arguments"] or "{}")
+                    except json.JSONDecodeError:
+                        args = {}
+                    calls.append({"id": call["id"], "name": call["name"], "args": args})
+                    yield encoder.tool_call(call["id"], call["name"], args)
+
+                results = await search_orchestrator.run_tool_calls(calls)
+                for result in results:
+                    yield encoder.tool_result(result["id"], result["result"])
+                yield encoder.finish_step("tool-calls")
+
+                conversation.append({
+                    "role": "assistant",
+                    "content": text or None,
+                    "tool_calls": [
+                        {
+                            "id": call["id"],
+                            "type": "function",
+                            "function": {"name": call["name"], "arguments": call["arguments"] or "{}"},
+                        }
+                        for call in tool_calls.values()
+                    ],
+                })
+                conversation += [
+                    {"role": "tool", "tool_call_id": result["id"], "content": result["content"]}
+                    for result in results
+                ]
+
+        except Exception as e:
+            # Send error using 3: identifier
+            yield encoder.error(str(e))
+
+    async def complete(self, messages, model="gpt-3.5-turbo", max_tokens=1024):
+        """Non-streaming completion, returns the response text"""
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+        )
+        return response.choices[0].message.content or ""
+
+    async def batch_complete(self, requests, model="gpt-3.5-turbo", max_tokens=1024, poll_interval=30):
+        """
+        Run ``{custom_id: messages}`` through the Batch API.
+        Yields ``(custom_id, text, error)`` once the batch has finished.
+        """
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": model, "messages": messages, "max_tokens": max_tokens},
+            })
+            for custom_id, messages in requests.items()
+        ]
+        input_file = await self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.batches.retrieve(batch.id)
+
+        seen = set()
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                seen.add(entry["custom_id"])
+                response = entry.get("response") or {}
+                if entry.get("error") or response.get("status_code") != 200:
+                    yield entry["custom_id"], None, str(entry.get("error") or response.get("body"))
+                else:
+                    choice = response["body"]["choices"][0]
+                    yield entry["custom_id"], choice["message"].get("content") or "", None
+
+        # Requests the batch never got to (failed or expired batches)
+        for custom_id in requests:
+            if custom_id not in seen:
+                yield custom_id, None, f"batch {batch.status}"
@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import environ
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+env = environ.Env(
+    KNOWMORE_PAGE_INDEX=(bool, True),
+    KNOWMORE_PAGE_INDEX_PATH=(str, str(BASE_DIR / 'page_index.sqlite3')),
+    # Local hits younger than this are used instead of calling Firecrawl
+    KNOWMORE_PAGE_INDEX_FRESH_HOURS=(float, 24),
+    # Pages older than this are pruned
+    KNOWMORE_PAGE_INDEX_RETENTION_DAYS=(float, 30),
+    # Size of the database file, FTS index included
+    KNOWMORE_PAGE_INDEX_MAX_MB=(float, 256),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    content TEXT NOT NULL DEFAULT '',
+    content_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_fetched_at ON pages (fetched_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    title, description, content,
+    content='pages', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts (rowid, title, description, content)
+    VALUES (new.id, new.title, new.description, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, title, description, content)
+    VALUES ('delete', old.id, old.title, old.description, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, title, description, content)
+    VALUES ('delete', old.id, old.title, old.description, old.content);
+    INSERT INTO pages_fts (rowid, title, description, content)
+    VALUES (new.id, new.title, new.description, new.content);
+END;
+"""
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'in', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'which',
+    'who', 'why', 'with', 'vs',
+}
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# Prune every N writes rather than on every insert
+PRUNE_INTERVAL = 50
+# Share of query terms a page must contain to count as a hit
+MIN_TERM_COVERAGE = 0.75
+
+
+class PageIndex:
+    """
+    Local SQLite FTS5 index of previously scraped pages, used as a first-tier
+    retriever before Firecrawl. All methods are blocking, use the ``a*``
+    variants from async code.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fresh_seconds: float = 24 * 3600,
+        retention_seconds: float = 30 * 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.path = path
+        self.fresh_seconds = fresh_seconds
+        self.retention_seconds = retention_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Lets pruning hand freed pages back to the filesystem, VACUUM applies it to older files
+        if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._conn.execute("VACUUM")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def add_pages(self, pages: List[Dict[str, Any]], fetched_at: Optional[float] = None) -> int:
+        """Insert or refresh scraped pages, returns the number of rows whose content changed"""
+        fetched_at = fetched_at or time.time()
+        changed = 0
+        with self._lock, self._conn:
+            for page in pages:
+                url = page.get("url")
+                if not url:
+                    continue
+                title = page.get("title") or ""
+                description = page.get("description") or ""
+                content = page.get("markdown") or ""
+                size = len(title) + len(description) + len(content)
+                content_hash = hashlib.sha1(
+                    "\0".join((title, description, content)).encode("utf-8")
+                ).hexdigest()
+
+                row = self._conn.execute(
+                    "SELECT content_hash FROM pages WHERE url = ?", (url,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO pages (url, title, description, content, content_hash, size, fetched_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (url, title, description, content, content_hash, size, fetched_at),
+                    )
+                    changed += 1
+                elif row[0] != content_hash:
+                    self._conn.execute(
+                        "UPDATE pages SET title = ?, description = ?, content = ?, content_hash = ?, "
+                        "size = ?, fetched_at = ? WHERE url = ?",
+                        (title, description, content, content_hash, size, fetched_at, url),
+                    )
+                    changed += 1
+                else:
+                    # Same content, only the fetch time moves so it stays fresh
+                    self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (fetched_at, url))
+
+            self._writes += 1
+            prune = self._writes % PRUNE_INTERVAL == 0
+            if prune:
+                self._prune()
+        if prune:
+            with self._lock:
+                self._compact()
+        return changed
+
+    def search(self, query: str, limit: int = 3, max_age: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` fresh pages covering most terms of ``query``, best match first"""
+        terms = self._terms(query)
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+        max_age = self.fresh_seconds if max_age is None else max_age
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.url, p.title, p.description, p.content, p.fetched_at "
+                "FROM pages_fts JOIN pages p ON p.id = pages_fts.rowid "
+                "WHERE pages_fts MATCH ? AND p.fetched_at >= ? "
+                "ORDER BY bm25(pages_fts, 5.0, 2.0, 1.0) LIMIT ?",
+                (match, time.time() - max_age, limit * 4),
+            ).fetchall()
+
+        results = []
+        required = max(1, round(len(terms) * MIN_TERM_COVERAGE))
+        for url, title, description, content, fetched_at in rows:
+            page_terms = set(TOKEN_RE.findall(f"{title} {description} {content}".lower()))
+            if sum(term in page_terms for term in terms) < required:
+                continue
+            results.append({
+                "url": url,
+                "title": title,
+                "description": description,
+                "markdown": content,
+                "fetchedAt": fetched_at,
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    def prune(self) -> int:
+        """Drop pages past retention, then the oldest pages until the database fits the size cap"""
+        with self._lock, self._conn:
+            removed = self._prune()
+        with self._lock:
+            self._compact()
+        return removed
+
+    def size(self) -> int:
+        """Bytes of the database in use, FTS index included"""
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - freelist) * page_size
+
+    def _prune(self) -> int:
+        removed = self._conn.execute(
+            "DELETE FROM pages WHERE fetched_at < ?", (time.time() - self.retention_seconds,)
+        ).rowcount
+
+        used = self.size()
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if used > self.max_bytes and total:
+            # Rows take up the file roughly in proportion to their text, index included,
+            # so drop that share of text. The next prune corrects any estimate error.
+            excess = (used - self.max_bytes) * total / used
+            # Walk from the oldest page, summing sizes until the excess is covered
+            cutoff = self._conn.execute(
+                "SELECT fetched_at, id FROM ("
+                "  SELECT fetched_at, id, SUM(size) OVER (ORDER BY fetched_at, id) AS running FROM pages"
+                ") WHERE running >= ? ORDER BY running LIMIT 1",
+                (excess,),
+            ).fetchone()
+            if cutoff is not None:
+                removed += self._conn.execute(
+                    "DELETE FROM pages WHERE (fetched_at, id) <= (?, ?)", cutoff
+                ).rowcount
+        return removed
+
+    def _compact(self):
+        # Deleted FTS rows are only tombstones until their segments are merged
+        self._conn.execute("INSERT INTO pages_fts (pages_fts) VALUES ('optimize')")
+        # executescript runs the pragma to completion, execute() frees a single page
+        self._conn.executescript("PRAGMA incremental_vacuum; PRAGMA wal_checkpoint(TRUNCATE);")
+
+    @staticmethod
+    def _terms(query: str) -> List[str]:
+        # Terms are plain word tokens and get quoted, so user text can't inject FTS5 syntax
+        terms = [
+            term for term in TOKEN_RE.findall(query.lower())
+            if term not in STOPWORDS and (len(term) > 1 or term.isdigit())
+        ]
+        return list(dict.fromkeys(terms))
+
+    async def aadd_pages(self, pages: List[Dict[str, Any]]) -> int:
+        return await asyncio.to_thread(self.add_pages, pages)
+
+    async def asearch(self, query: str, limit: int = 3, max_age: Optional[float] = None) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.search, query, limit, max_age)
+
+
+_page_index = None
+_page_index_lock = threading.Lock()
+
+
+def get_page_index() -> Optional[PageIndex]:
+    """Process-wide page index, ``None`` when disabled with KNOWMORE_PAGE_INDEX=false"""
+    global _page_index
+    if not env("KNOWMORE_PAGE_INDEX"):
+        return None
+    with _page_index_lock:
+        if _page_index is None:
+            _page_index = PageIndex(
+                env("KNOWMORE_PAGE_INDEX_PATH"),
+                fresh_seconds=env("KNOWMORE_PAGE_INDEX_FRESH_HOURS") * 3600,
+                retention_seconds=env("KNOWMORE_PAGE_INDEX_RETENTION_DAYS") * 24 * 3600,
+                max_bytes=int(env("KNOWMORE_PAGE_INDEX_MAX_MB") * 1024 * 1024),
+            )
+    return _page_index
@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import environ
+
+env = environ.Env(
+    # Backends queried by web searches, fastest expected first
+    KNOWMORE_SEARCH_BACKENDS=(list, ['local_index', 'firecrawl']),
+    # Start the next backend if the ones running haven't answered within this
+    KNOWMORE_SEARCH_HEDGE_MS=(float, 250),
+    # Good result sets to wait for before merging, 1 means the first one wins
+    KNOWMORE_SEARCH_QUORUM=(int, 1),
+)
+
+logger = logging.getLogger(__name__)
+
+STATS_WINDOW = 50
+# Keeps a backend that rarely returns enough results from sorting to infinity
+MIN_GOOD_RATE = 0.01
+
+# Searches still finishing after their fan-out returned, see SearchFanout.execute
+_late_searches = set()
+
+
+class SearchBackend:
+    """
+    A web search source with the tool shape of ``get_name``/``get_parameters``/``execute``.
+    ``execute(query=..., limit=..., **options)`` returns ``{"success": True, "results": [...], "query"}``
+    or ``{"error": ..., "results": []}``, result pages carrying at least ``url``.
+    """
+    name = None
+    # Seconds, used for ordering until the backend has measurements
+    expected_latency = 1.0
+    # Whether the ``location`` and ``tbs`` filters are honoured
+    supports_filters = False
+
+    def get_name(self) -> str:
+        return "web_search"
+
+    def get_description(self) -> str:
+        return "Search the web. Returns titles, descriptions and URLs."
+
+    def get_parameters(self) -> Dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "The search query"},
+                "limit": {"type": "integer", "description": "Number of search results to return", "default": 5},
+            },
+            "required": ["query"]
+        }
+
+    async def execute(self, **kwargs) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class PageIndexBackend(SearchBackend):
+    """Fresh pages from the local page index, scraped by earlier searches"""
+    name = 'local_index'
+    expected_latency = 0.02
+
+    def __init__(self, page_index):
+        self.page_index = page_index
+
+    async def execute(self, **kwargs) -> Dict[str, Any]:
+        results = await self.page_index.asearch(kwargs["query"], limit=kwargs.get("limit", 5))
+        return {"success": True, "results": results, "query": kwargs["query"]}
+
+
+class BackendStats:
+    """Rolling latency, error and good-result rates per search backend"""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self.window = window
+        self._latency = {}
+        self._errors = {}
+        self._good = {}
+
+    def record(self, name: str, seconds: float, ok: bool, good: bool):
+        self._latency.setdefault(name, deque(maxlen=self.window)).append(seconds)
+        self._errors.setdefault(name, deque(maxlen=self.window)).append(not ok)
+        self._good.setdefault(name, deque(maxlen=self.window)).append(good)
+
+    def latency(self, name: str) -> Optional[float]:
+        samples = self._latency.get(name)
+        return sum(samples) / len(samples) if samples else None
+
+    def error_rate(self, name: str) -> float:
+        samples = self._errors.get(name)
+        return sum(samples) / len(samples) if samples else 0.0
+
+    def good_rate(self, name: str) -> float:
+        samples = self._good.get(name)
+        return sum(samples) / len(samples) if samples else 1.0
+
+    def expected_time_to_good(self, backend: SearchBackend) -> float:
+        """Latency divided by the chance of a good result set, the ordering key"""
+        latency = self.latency(backend.name)
+        latency = backend.expected_latency if latency is None else latency
+        return latency / max(self.good_rate(backend.name), MIN_GOOD_RATE)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "latency": self.latency(name),
+                "errorRate": self.error_rate(name),
+                "goodRate": self.good_rate(name),
+                "samples": len(self._latency[name]),
+            }
+            for name in self._latency
+        }
+
+
+backend_stats = BackendStats()
+
+
+def scraped_pages(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pages worth adding to the page index: scraped, and not served by the index itself"""
+    return [page for page in results if "fetchedAt" not in page and page.get("markdown")]
+
+
+def normalise_url(url: str) -> str:
+    """Dedupe key, ignores scheme and host case, fragments and trailing slashes"""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), parts.query, ''))
+
+
+def merge_results(result_sets: List[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+    """Interleave result sets, best ranks first, dropping pages already seen by URL"""
+    merged = []
+    seen = set()
+    for rank in range(max((len(results) for results in result_sets), default=0)):
+        for results in result_sets:
+            if rank >= len(results) or not results[rank].get("url"):
+                continue
+            key = normalise_url(results[rank]["url"])
+            if key not in seen:
+                seen.add(key)
+                merged.append(results[rank])
+    return merged[:limit]
+
+
+class SearchFanout(SearchBackend):
+    """
+    Queries several backends as one. Backends start in order of their expected
+    time to a good result set (at least ``limit`` pages), the next one when the
+    running ones fail, come back short or take longer than ``hedge_delay``.
+    Returns once ``quorum`` good result sets are in, or when every backend has
+    answered, with the results merged and deduplicated by URL.
+
+    Backends still running at that point are not cancelled: Firecrawl runs in
+    a thread, so its request would carry on (and be billed) anyway. They finish
+    in the background, which keeps their latency in the stats, and their
+    scraped pages go into ``page_index`` for later searches. Hedging therefore
+    costs an extra Firecrawl search whenever a hedged request loses.
+    """
+    name = 'fanout'
+
+    def __init__(
+        self,
+        backends: List[SearchBackend],
+        stats: BackendStats = backend_stats,
+        quorum: int = 1,
+        hedge_delay: float = 0.25,
+        page_index=None,
+    ):
+        self.backends = backends
+        self.stats = stats
+        self.quorum = max(1, quorum)
+        self.hedge_delay = hedge_delay
+        self.page_index = page_index
+
+    def _tool_backend(self) -> SearchBackend:
+        # The richest tool schema, so the model can use filters some backends honour
+        return next((b for b in self.backends if b.supports_filters), self.backends[0])
+
+    def get_name(self) -> str:
+        return self._tool_backend().get_name()
+
+    def get_description(self) -> str:
+        return self._tool_backend().get_description()
+
+    def get_parameters(self) -> Dict[str, Any]:
+        return self._tool_backend().get_parameters()
+
+    def ordered(self, filtered: bool = False) -> List[SearchBackend]:
+        backends = [b for b in self.backends if b.supports_filters or not filtered]
+        return sorted(backends, key=self.stats.expected_time_to_good)
+
+    async def _run(self, backend, limit, kwargs):
+        start = time.perf_counter()
+        try:
+            result = await backend.execute(limit=limit, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result = {"error": f"{backend.name} failed: {e}", "results": []}
+        ok = bool(result.get("success"))
+        good = ok and len(result.get("results", [])) >= limit
+        self.stats.record(backend.name, time.perf_counter() - start, ok, good)
+        return result, good
+
+    async def _finish_late(self, task):
+        """Wait for a search that lost the race and index the pages it scraped"""
+        try:
+            result, _ = await task
+            pages = scraped_pages(result.get("results", []))
+            if self.page_index is not None and pages:
+                await self.page_index.aadd_pages(pages)
+        except Exception as e:
+            logger.warning("late search result dropped: %s", e)
+
+    async def execute(self, **kwargs) -> Dict[str, Any]:
+        query = kwargs["query"]
+        limit = kwargs.pop("limit", 5)
+        queue = self.ordered(filtered=any(kwargs.get(key) for key in ("location", "tbs")))
+        if not queue:
+            return {"error": "No search backend supports these filters", "results": []}
+
+        pending = {}
+        answered = []
+        good_count = 0
+
+        def launch():
+            backend = queue.pop(0)
+            pending[asyncio.ensure_future(self._run(backend, limit, kwargs))] = backend
+
+        launch()
+        while queue and self.hedge_delay <= 0:
+            launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, timeout=self.hedge_delay if queue else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # Hedge: the running backends are slower than we want to wait for
+                    launch()
+                    continue
+                for task in done:
+                    backend = pending.pop(task)
+                    result, good = task.result()
+                    answered.append((backend, result, good))
+                    good_count += good
+                if good_count >= self.quorum:
+                    break
+                if queue:
+                    launch()
+        finally:
+            for task in pending:
+                late = asyncio.ensure_future(self._finish_late(task))
+                _late_searches.add(late)
+                late.add_done_callback(_late_searches.discard)
+
+        used = [(b, r) for b, r, good in answered if good] if good_count >= self.quorum else [
+            (b, r) for b, r, _ in answered if r.get("success")
+        ]
+        logger.info("search fan-out", extra={
+            "query": query,
+            "answered": {b.name: len(r.get("results", [])) for b, r, _ in answered},
+            "used": [b.name for b, _ in used],
+        })
+        if not used:
+            return {"error": answered[-1][1].get("error", "Unknown error"), "results": []}
+        return {
+            "success": True,
+            "results": merge_results([r.get("results", []) for _, r in used], limit),
+            "query": query,
+            "source": "+".join(b.name for b, _ in used),
+        }
+
+
+def create_search_fanout(page_index=None) -> SearchFanout:
+    """Fan-out over the backends named in KNOWMORE_SEARCH_BACKENDS"""
+    from .web_search_firecrawl import FirecrawlWebSearch
+
+    factories = {
+        'firecrawl': FirecrawlWebSearch,
+        'local_index': lambda: PageIndexBackend(page_index) if page_index is not None else None,
+    }
+    backends = []
+    for name in env("KNOWMORE_SEARCH_BACKENDS"):
+        if name not in factories:
+            raise ValueError(f"Unknown search backend: {name}")
+        backend = factories[name]()
+        if backend is not None:
+            backends.append(backend)
+    if not backends:
+        raise ValueError("No search backend enabled, check KNOWMORE_SEARCH_BACKENDS")
+    return SearchFanout(
+        backends,
+        quorum=env("KNOWMORE_SEARCH_QUORUM"),
+        hedge_delay=env("KNOWMORE_SEARCH_HEDGE_MS") / 1000,
+        page_index=page_index,
+    )
@@ -1,9 +1,22 @@
 import json
 import asyncio
+import logging
+import time
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from .claude_service import ClaudeService
-from .web_search_firecrawl import FirecrawlWebSearch
+from .search_backends import create_search_fanout, scraped_pages
+from .page_index import get_page_index
+from .content_cleaner import get_content_cleaner
+from .conversation_context import get_conversation_contexts
+from .search_policy import LEVELS, search_policy
+
+logger = logging.getLogger(__name__)
+# Per-result details, sampled by KNOWMORE_LOG_RESULT_SAMPLE_RATE
+result_logger = logging.getLogger("knowmore.search.results")
+
+# Rounds of searches the model may run in tool mode before it has to answer
+MAX_SEARCH_STEPS = 2
 
 
 class SearchOrchestrator:
@@ -11,10 +24,23 @@ class SearchOrchestrator:
     Orchestrates web search functionality including query extraction and search execution.
     Separates search logic from streaming concerns.
     """
+
+    max_search_steps = MAX_SEARCH_STEPS
     
     def __init__(self):
         self.claude_service = ClaudeService()
-        self.search_tool = FirecrawlWebSearch()
+        self.page_index = get_page_index()
+        self.search_tool = create_search_fanout(self.page_index)
+        self.content_cleaner = get_content_cleaner()
+        self.conversation_contexts = get_conversation_contexts()
+        self.policy = search_policy
+        # Search work for this request, see apply_load_policy
+        self.level = LEVELS[0]
+    
+    def apply_load_policy(self) -> Dict[str, Any]:
+        """Scale this request's search work to the current load, returns the level in effect"""
+        self.level = self.policy.update()
+        return self.level
     
     
     async def generate_search_queries(self, messages: List[Dict[str, Any]]) -> List[str]:
@@ -23,6 +49,11 @@ class SearchOrchestrator:
         if not last_message:
             return []
         
+        # Under heavy load search for the message itself instead of asking the LLM
+        if not self.level["generateQueries"]:
+            query = " ".join(last_message.split())[:99]
+            return [query] if len(query) > 5 else []
+        
         # Get conversation context (last 3-5 messages)
         conversation_context = self._get_conversation_context(messages, max_messages=5)
         
@@ -68,44 +99,94 @@ Return ONLY the 3 search queries, one per line, no explanation or numbering:"""
             # Split by newlines and clean up
             queries = [q.strip() for q in queries_text.split('\n') if q.strip()]
             
-            # Basic validation and limit to 3
+            # Basic validation and limit to 3, fewer under load
             valid_queries = []
             for query in queries[:3]:
                 if 5 < len(query) < 100:
                     valid_queries.append(query)
+            valid_queries = valid_queries[:self.level["queries"]]
             
-            # Log generated search queries
-            print("\n" + "="*60)
-            print("🔍 GENERATED SEARCH QUERIES:")
-            for i, query in enumerate(valid_queries, 1):
-                print(f"  {i}. {query}")
-            print("="*60 + "\n")
+            logger.info("generated search queries", extra={"queries": valid_queries})
             
             return valid_queries
                 
         except Exception as e:
-            print(f"Query generation failed: {e}")
+            logger.warning("query generation failed: %s", e)
         
         return []
     
-    async def execute_search(self, query: str) -> Dict[str, Any]:
+    async def generate_search_queries_batch(self, questions: List[str]) -> List[List[str]]:
+        """Generate 3 web search queries for each of several standalone questions in one LLM call"""
+        if not questions:
+            return []
+        
+        current_date = datetime.now()
+        numbered = "\n".join(f"{i}. {question}" for i, question in enumerate(questions, 1))
+        query_messages = [
+            {
+                "role": "user",
+                "content": f"""Generate 3 different web search queries for each of the numbered questions below.
+The queries for a question should approach the topic from different angles or search for different aspects.
+
+Current date: {current_date.strftime('%B %d, %Y')}
+If a question asks about "latest", "recent", "current", or "new" information, include the current year ({current_date.year}) or month in relevant queries.
+
+Questions:
+{numbered}
+
+Return ONLY a JSON object mapping each question number to an array of 3 search queries, no explanation:"""
+            }
+        ]
+        
+        try:
+            response = await self.claude_service.client.messages.create(
+                model="claude-3-5-haiku-latest",
+                max_tokens=100 * len(questions) + 50,
+                messages=query_messages
+            )
+            text = response.content[0].text
+            queries_by_number = json.loads(text[text.index("{"):text.rindex("}") + 1])
+        except Exception as e:
+            logger.warning("batch query generation failed: %s", e)
+            return [[] for _ in questions]
+        
+        batch_queries = []
+        for i in range(1, len(questions) + 1):
+            queries = queries_by_number.get(str(i)) or []
+            batch_queries.append([
+                q.strip() for q in queries[:3] if isinstance(q, str) and 5 < len(q.strip()) < 100
+            ])
+        return batch_queries
+    
+    async def execute_search(self, query: str, limit: int = 3, scrape_content: bool = True, **search_options) -> Dict[str, Any]:
         """Execute web search and return formatted results"""
+        # limit defaults to 3 (reduced from 5) since we're doing 3 searches
         try:
+            # Fans out over the search backends, the local page index included
             result = await self.search_tool.execute(
                 query=query,
-                limit=3,  # Reduced from 5 to 3 since we're doing 3 searches
-                scrape_content=True,
-                formats=["markdown"]
+                limit=limit,
+                scrape_content=scrape_content,
+                formats=["markdown"],
+                **search_options
             )
             
             if result.get("success"):
                 search_results = result.get("results", [])
+                # Pages served by the index itself carry fetchedAt, unscraped pages have nothing to index
+                scraped = scraped_pages(search_results)
+                if self.page_index is not None and scraped:
+                    try:
+                        await self.page_index.aadd_pages(scraped)
+                    except Exception as e:
+                        logger.warning("page index update failed: %s", e)
                 return {
                     "results": search_results,
                     "filterTags": [],
                     "summary": f"Found {len(search_results)} relevant sources about {query}",
                     "success": True,
-                    "query": query
+                    "query": query,
+                    "source": result.get("source")
                 }
             else:
                 return {
@@ -130,48 +211,128 @@ Return ONLY the 3 search queries, one per line, no explanation or numbering:"""
         if not queries:
             return []
         
-        print("\n" + "="*60)
-        print("🚀 EXECUTING CONCURRENT SEARCHES...")
-        print("="*60)
-        
         # Create tasks for all queries
-        tasks = [self.execute_search(query) for query in queries]
+        tasks = [
+            self.execute_search(query, limit=self.level["results"], scrape_content=self.level["scrape"])
+            for query in queries
+        ]
         
         # Execute all searches concurrently
+        start = time.perf_counter()
         results = await asyncio.gather(*tasks, return_exceptions=True)
+        self.policy.record_search(time.perf_counter() - start)
         
         # Filter out exceptions and return valid results
         valid_results = []
         for i, (query, result) in enumerate(zip(queries, results), 1):
             if isinstance(result, dict) and not isinstance(result, Exception):
                 valid_results.append(result)
-                
-                # Log search results
-                print(f"\n📊 Search #{i}: '{query}'")
-                print(f"   Status: {'✅ Success' if result.get('success') else '❌ Failed'}")
                 if result.get('success'):
-                    results_count = len(result.get('results', []))
-                    print(f"   Results: {results_count} sources found")
-                    
-                    # Log top 3 results
-                    for j, res in enumerate(result.get('results', [])[:3], 1):
-                        print(f"\n   Result {j}:")
-                        print(f"     Title: {res.get('title', 'N/A')}")
-                        print(f"     URL: {res.get('url', 'N/A')}")
-                        if res.get('description'):
-                            desc = res.get('description', '')[:100] + '...' if len(res.get('description', '')) > 100 else res.get('description', '')
-                            print(f"     Preview: {desc}")
+                    logger.info("search succeeded", extra={
+                        "query": query,
+                        "source": result.get("source"),
+                        "results": len(result.get('results', [])),
+                    })
+                    if result_logger.isEnabledFor(logging.DEBUG):
+                        for res in result.get('results', [])[:3]:
+                            result_logger.debug("search result", extra={
+                                "query": query,
+                                "title": res.get('title'),
+                                "url": res.get('url'),
+                                "preview": (res.get('description') or '')[:100],
+                            })
                 else:
-                    print(f"   Error: {result.get('summary', 'Unknown error')}")
+                    logger.warning("search failed", extra={"query": query, "error": result.get('summary')})
             else:
-                print(f"\n❌ Search #{i}: '{queries[i-1]}' - Failed with exception: {result}")
+                logger.warning("search raised", extra={"query": query, "error": str(result)})
         
-        print("\n" + "="*60)
-        print(f"✨ SEARCH COMPLETE: {len(valid_results)}/{len(queries)} searches successful")
-        print("="*60 + "\n")
+        logger.info("searches complete", extra={"succeeded": len(valid_results), "queries": len(queries)})
         
         return valid_results
     
+    def reusable_search_results(self, messages: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Search results kept from earlier turns when they cover the latest question"""
+        if self.conversation_contexts is None:
+            return None
+        question = self._get_last_user_message(messages) or ""
+        return self.conversation_contexts.reusable(messages, question, self.level["queries"])
+    
+    def remember_search_results(self, messages: List[Dict[str, Any]], search_results_list: List[Dict[str, Any]]):
+        """Keep this turn's cleaned search results for follow-up questions"""
+        if self.conversation_contexts is not None:
+            self.conversation_contexts.remember(messages, search_results_list)
+    
+    def get_tool_definition(self) -> Dict[str, Any]:
+        """Name, description and JSON schema of the web search tool for native tool calling"""
+        return {
+            "name": self.search_tool.get_name(),
+            "description": self.search_tool.get_description(),
+            "parameters": self.search_tool.get_parameters(),
+        }
+    
+    async def run_tool_calls(self, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Execute model-issued web search tool calls (``{"id", "name", "args"}``) concurrently.
+        Returns ``{"id", "result", "content"}`` per call, ``result`` for the client and
+        ``content`` as the text handed back to the model.
+        """
+        async def run(call):
+            args = call.get("args") or {}
+            query = args.get("query")
+            if call.get("name") != self.search_tool.get_name() or not isinstance(query, str) or not query.strip():
+                return {
+                    "results": [],
+                    "filterTags": [],
+                    "summary": "Invalid web search call",
+                    "success": False,
+                    "query": query or ""
+                }
+            options = {key: args[key] for key in ("location", "tbs") if args.get(key)}
+            try:
+                limit = min(max(int(args.get("limit") or 3), 1), 5)
+            except (TypeError, ValueError):
+                limit = 3
+            return await self.execute_search(query.strip(), limit=limit, **options)
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run(call) for call in calls))
+        self.policy.record_search(time.perf_counter() - start)
+        cleaned = await self.clean_search_results(list(results))
+        return [
+            {
+                "id": call["id"],
+                "result": result,
+                "content": self.build_search_context([cleaned_result]) or result.get("summary", "No results found")
+            }
+            for call, result, cleaned_result in zip(calls, results, cleaned)
+        ]
+    
+    async def clean_search_results(self, search_results_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Strip boilerplate from scraped pages in the process pool and attach the passages as ``content``"""
+        if self.content_cleaner is None:
+            return search_results_list
+        
+        pages = [result for search_result in search_results_list for result in search_result.get("results", [])[:3]]
+        pages = [page for page in pages if page.get("markdown")]
+        if not pages:
+            return search_results_list
+        
+        try:
+            cleaned_pages = await self.content_cleaner.clean(pages)
+        except Exception as e:
+            logger.warning("content cleaning failed: %s", e)
+            return search_results_list
+        
+        content_by_url = {page["url"]: "\n\n".join(page["passages"]) for page in cleaned_pages}
+        cleaned_list = []
+        for search_result in search_results_list:
+            results = []
+            for result in search_result.get("results", []):
+                content = content_by_url.get(result.get("url", ""))
+                results.append({**result, "content": content} if content else result)
+            cleaned_list.append({**search_result, "results": results})
+        return cleaned_list
+    
     def enhance_messages_with_search(
         self, 
         messages: List[Dict[str, Any]], 
@@ -188,7 +349,7 @@ Return ONLY the 3 search queries, one per line, no explanation or numbering:"""
         for i, result in enumerate(search_results["results"][:5]):
             title = result.get("title", "")
             url = result.get("url", "")
-            content = result.get("markdown", result.get("description", ""))
+            content = result.get("content") or result.get("markdown", result.get("description", ""))
             
             context_parts.append(f"\n{i+1}. {title}")
             context_parts.append(f"   URL: {url}")
@@ -216,14 +377,10 @@ Return ONLY the 3 search queries, one per line, no explanation or numbering:"""
         
         return enhanced_messages
     
-    def enhance_messages_with_multiple_searches(
-        self, 
-        messages: List[Dict[str, Any]], 
-        search_results_list: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
-        """Inject multiple search results into conversation context"""
+    def build_search_context(self, search_results_list: List[Dict[str, Any]]) -> str:
+        """Format search results as context for the model, empty when there are no results"""
         if not search_results_list or not any(sr.get("results") for sr in search_results_list):
-            return messages
+            return ""
         
         # Build combined search context
         context_parts = ["Web search results from multiple queries:"]
@@ -236,21 +393,32 @@ Return ONLY the 3 search queries, one per line, no explanation or numbering:"""
             query = search_result.get("query", "Unknown query")
             context_parts.append(f"\n## Search: '{query}'")
             
-            for result in search_result["results"][:3]:  # Limit to 3 results per search
+            for result in search_result["results"][:self.level["results"]]:  # Limit to 3 results per search, fewer under load
                 title = result.get("title", "")
                 url = result.get("url", "")
-                content = result.get("markdown", result.get("description", ""))
+                content = result.get("content") or result.get("markdown", result.get("description", ""))
                 
                 context_parts.append(f"\n{result_counter}. {title}")
                 context_parts.append(f"   URL: {url}")
                 if content:
                     # Limit content length
-                    content = content[:300] + "..." if len(content) > 300 else content
+                    max_chars = self.level["contentChars"]
+                    content = content[:max_chars] + "..." if len(content) > max_chars else content
                     context_parts.append(f"   Content: {content}")
                 
                 result_counter += 1
         
-        search_context = "\n".join(context_parts)
+        return "\n".join(context_parts)
+    
+    def enhance_messages_with_multiple_searches(
+        self, 
+        messages: List[Dict[str, Any]], 
+        search_results_list: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Inject multiple search results into conversation context"""
+        search_context = self.build_search_context(search_results_list)
+        if not search_context:
+            return messages
         
         enhanced_messages = []
         
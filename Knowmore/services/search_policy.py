@@ -0,0 +1,115 @@
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import environ
+
+from .model_router import model_stats
+from .search_backends import backend_stats
+
+env = environ.Env(
+    KNOWMORE_SEARCH_DEGRADATION=(bool, True),
+    # Load at which each signal counts as saturated
+    KNOWMORE_SEARCH_MAX_STREAMS=(int, 32),
+    KNOWMORE_SEARCH_TARGET_SECONDS=(float, 6),
+    KNOWMORE_SEARCH_MAX_ERROR_RATE=(float, 0.25),
+    # Seconds a level is held before stepping back down
+    KNOWMORE_SEARCH_LEVEL_COOLDOWN=(float, 30),
+    # How far below a level's threshold load must fall to leave it
+    KNOWMORE_SEARCH_HYSTERESIS=(float, 0.2),
+)
+
+# Search work per degradation level, cheapest last
+LEVELS = (
+    {"level": 0, "name": "full", "generateQueries": True, "queries": 3, "results": 3, "scrape": True, "contentChars": 300},
+    {"level": 1, "name": "reduced", "generateQueries": True, "queries": 2, "results": 3, "scrape": True, "contentChars": 200},
+    {"level": 2, "name": "no_scrape", "generateQueries": True, "queries": 2, "results": 2, "scrape": False, "contentChars": 200},
+    {"level": 3, "name": "minimal", "generateQueries": False, "queries": 1, "results": 2, "scrape": False, "contentChars": 150},
+)
+# Load score at which each level above full is entered
+LEVEL_THRESHOLDS = (0.75, 1.0, 1.5)
+
+STATS_WINDOW = 20
+
+
+class SearchPolicy:
+    """
+    Picks how much search work a request gets from live load: streams in
+    flight, recent pipeline search latency and the provider and search
+    backend error rates. Each signal is scaled so 1.0 means saturated and the
+    worst one is the load score. Higher levels are entered as soon as the score
+    crosses their threshold; a level is only left after ``cooldown`` seconds
+    and once the score is ``hysteresis`` below its threshold, one step at a time.
+    """
+
+    def __init__(
+        self,
+        max_streams: int = 32,
+        target_seconds: float = 6,
+        max_error_rate: float = 0.25,
+        cooldown: float = 30,
+        hysteresis: float = 0.2,
+        enabled: bool = True,
+    ):
+        self.max_streams = max_streams
+        self.target_seconds = target_seconds
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.hysteresis = hysteresis
+        self.enabled = enabled
+        self.streams_in_flight = 0
+        self.level = 0
+        self._changed_at = 0.0
+        self._search_seconds = deque(maxlen=STATS_WINDOW)
+
+    async def track(self, stream):
+        """Pass frames through, counting the stream as in flight until it ends"""
+        self.streams_in_flight += 1
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            self.streams_in_flight -= 1
+
+    def record_search(self, seconds: float):
+        self._search_seconds.append(seconds)
+
+    def signals(self) -> Dict[str, float]:
+        search_seconds = sum(self._search_seconds) / len(self._search_seconds) if self._search_seconds else 0.0
+        backends = backend_stats.snapshot()
+        error_rate = max([model_stats.error_rate()] + [stats["errorRate"] for stats in backends.values()])
+        return {
+            "streams": self.streams_in_flight / self.max_streams,
+            "searchLatency": search_seconds / self.target_seconds,
+            "errorRate": error_rate / self.max_error_rate,
+        }
+
+    @staticmethod
+    def _level_for(score: float) -> int:
+        return sum(score >= threshold for threshold in LEVEL_THRESHOLDS)
+
+    def update(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Re-evaluate the level from current signals, returns its settings"""
+        if not self.enabled:
+            return LEVELS[0]
+        now = time.monotonic() if now is None else now
+        score = max(self.signals().values())
+        target = self._level_for(score)
+        if target > self.level:
+            self.level = target
+            self._changed_at = now
+        elif target < self.level and now - self._changed_at >= self.cooldown:
+            if self._level_for(score + self.hysteresis) < self.level:
+                self.level -= 1
+                self._changed_at = now
+        return LEVELS[self.level]
+
+
+search_policy = SearchPolicy(
+    max_streams=env("KNOWMORE_SEARCH_MAX_STREAMS"),
+    target_seconds=env("KNOWMORE_SEARCH_TARGET_SECONDS"),
+    max_error_rate=env("KNOWMORE_SEARCH_MAX_ERROR_RATE"),
+    cooldown=env("KNOWMORE_SEARCH_LEVEL_COOLDOWN"),
+    hysteresis=env("KNOWMORE_SEARCH_HYSTERESIS"),
+    enabled=env("KNOWMORE_SEARCH_DEGRADATION"),
+)
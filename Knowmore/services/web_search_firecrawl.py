@@ -1,17 +1,51 @@
+import asyncio
 import json
-import requests
+import logging
+import threading
 import environ
 from typing import Dict, Any, List
 
+from .search_backends import SearchBackend
+
 env = environ.Env(
     FIRE_CRAWL_API_TOKEN=str,
 )
 
-class FirecrawlWebSearch:    
+FIRECRAWL_BASE_URL = "https://api.firecrawl.dev/v1"
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Shared HTTP session so Firecrawl connections are kept alive between searches.
+    Searches post through it from ``asyncio.to_thread`` workers concurrently:
+    urllib3's connection pool and the cookie jar lock internally, and headers
+    are passed per request so nothing else on the session changes after it is
+    created here. Keep it that way: mounting adapters or setting session
+    headers later would not be thread-safe.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                _session = requests.Session()
+    return _session
+
+
+class FirecrawlWebSearch(SearchBackend):
+    name = 'firecrawl'
+    expected_latency = 3.0
+    supports_filters = True
+
     def __init__(self):
         super().__init__()
         self.api_key = env("FIRE_CRAWL_API_TOKEN")
-        self.base_url = "https://api.firecrawl.dev/v1"
+        self.base_url = FIRECRAWL_BASE_URL
     
     def get_name(self) -> str:
         return "web_search"
@@ -87,8 +121,21 @@ class FirecrawlWebSearch:
                 "formats": kwargs.get("formats", ["markdown"])
             }
         
+        # requests blocks and is slow to import, keep both off the event loop
+        # so backends really run concurrently
         try:
-            response = requests.post(
+            return await asyncio.to_thread(self._search, payload)
+        except Exception as e:
+            return {
+                "error": f"Unexpected error: {str(e)}",
+                "results": []
+            }
+    
+    def _search(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import requests
+
+        try:
+            response = get_session().post(
                 f"{self.base_url}/search",
                 headers={
                     "Content-Type": "application/json",
@@ -103,10 +150,10 @@ class FirecrawlWebSearch:
                 return {
                     "success": True,
                     "results": data.get("data", []),
-                    "query": kwargs["query"]
+                    "query": payload["query"]
                 }
             else:
-                print("firecrawl:search failed with status", f"Bearer {self.api_key}")
+                logger.warning("firecrawl search failed", extra={"status": response.status_code})
                 return {
                     "error": f"Search failed with status {response.status_code}",
                     "details": response.text,
@@ -118,8 +165,3 @@ class FirecrawlWebSearch:
                 "error": f"Network error: {str(e)}",
                 "results": []
             }
-        except Exception as e:
-            return {
-                "error": f"Unexpected error: {str(e)}",
-                "results": []
-            }
@@ -4,6 +4,12 @@ import environ
 
 env = environ.Env(
     SECRET_KEY=str,
+    KNOWMORE_API_ONLY=(bool, False),
+    KNOWMORE_WARMUP=(bool, False),
+    KNOWMORE_SEARCH_MODE=(str, 'pipeline'),
+    KNOWMORE_LOG_LEVEL=(str, 'INFO'),
+    KNOWMORE_LOG_FORMAT=(str, 'json'),
+    KNOWMORE_LOG_RESULT_SAMPLE_RATE=(float, 0.1),
 )
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -23,6 +29,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'compressor',
+    'Knowmore',
 ]
 
 MIDDLEWARE = [
@@ -35,6 +42,72 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Slim config for workers that only serve the streaming API: skips admin,
+# auth, sessions, messages and compressor, and the UI routes that need them.
+KNOWMORE_API_ONLY = env("KNOWMORE_API_ONLY")
+
+if KNOWMORE_API_ONLY:
+    INSTALLED_APPS = [
+        'daphne',
+        'django.contrib.staticfiles',
+        'Knowmore',
+    ]
+
+    MIDDLEWARE = [
+        'django.middleware.security.SecurityMiddleware',
+        'django.middleware.common.CommonMiddleware',
+    ]
+
+# Pre-connect to the AI providers and Firecrawl once the server starts. Each
+# worker then makes one models.list call per provider with an API key set and
+# a HEAD request to Firecrawl, so it's off by default.
+KNOWMORE_WARMUP = env("KNOWMORE_WARMUP")
+
+# 'pipeline' always generates queries and searches before answering,
+# 'tool' hands the model the web search tool and lets it decide
+KNOWMORE_SEARCH_MODE = env("KNOWMORE_SEARCH_MODE")
+
+# Log records are queued on the event loop and written by a background thread.
+# Per-search-result records are DEBUG and only kept for a sample of requests.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_context': {'()': 'Knowmore.log.RequestContextFilter'},
+        'sample_results': {
+            '()': 'Knowmore.log.SamplingFilter',
+            'rate': env("KNOWMORE_LOG_RESULT_SAMPLE_RATE"),
+        },
+    },
+    'formatters': {
+        'json': {'()': 'Knowmore.log.JsonFormatter'},
+        'text': {
+            '()': 'Knowmore.log.TextFormatter',
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'queue': {
+            '()': 'Knowmore.log.QueueingHandler',
+            'formatter': env("KNOWMORE_LOG_FORMAT"),
+            'filters': ['request_context'],
+        },
+    },
+    'loggers': {
+        'Knowmore': {
+            'handlers': ['queue'],
+            'level': env("KNOWMORE_LOG_LEVEL"),
+            'propagate': False,
+        },
+        'knowmore.search.results': {
+            'handlers': ['queue'],
+            'level': 'DEBUG',
+            'filters': ['request_context', 'sample_results'],
+            'propagate': False,
+        },
+    },
+}
+
 ASGI_APPLICATION = "Knowmore.asgi.application"
 
 ROOT_URLCONF = 'Knowmore.urls'
@@ -48,9 +121,10 @@ TEMPLATES = [
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
+            ] + ([] if KNOWMORE_API_ONLY else [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-            ],
+            ]),
         },
     },
 ]
@@ -114,5 +188,6 @@ COMPRESS_ENABLED = True
 STATICFILES_FINDERS = (
     'django.contrib.staticfiles.finders.FileSystemFinder',
     'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+) + (() if KNOWMORE_API_ONLY else (
     'compressor.finders.CompressorFinder',
-)
+))
@@ -1,13 +1,21 @@
-import os
 import json
+import uuid
 
+from django.conf import settings
 from django.http import StreamingHttpResponse, JsonResponse
 from django.shortcuts import render
 
 from .utils import get_vite_assets
+from .assets import vite_manifest
+from .log import bind_request
+from .compression import stream_body
+from .protocol import get_encoder
 from .handlers.stream_handler import event_stream, error_stream
+from .handlers.stream_registry import stream_registry
 from .handlers.message_processor import format_messages
 from .services.ai_provider import AIProviderFactory
+from .services.model_router import routing_enabled
+from .services.search_policy import search_policy
 
 def index(request):
     assets = get_vite_assets()
@@ -23,20 +31,68 @@ async def sse_stream(request):
         messages = body.get('messages', [])
         model = body.get('model', 'claude-3-5-sonnet-20240620')
         enable_web_search = body.get('enable_web_search', False)
+        search_mode = body.get('search_mode', settings.KNOWMORE_SEARCH_MODE)
+        encoder = get_encoder(body.get('protocol'))
 
         if not messages:
-            return StreamingHttpResponse(error_stream('No messages found'), content_type='text/event-stream', status=400)
+            return StreamingHttpResponse(error_stream('No messages found', encoder), content_type=encoder.content_type, status=400)
 
         input_messages = format_messages(messages)
-        response = StreamingHttpResponse(
-            event_stream(input_messages, model, enable_web_search=enable_web_search), 
-            content_type='text/event-stream'
+        routing = None
+        if routing_enabled(body.get('routing')):
+            routing = AIProviderFactory.route(model, input_messages, enable_web_search=enable_web_search)
+            model = routing['model']
+
+        # The background task copies this context, so its logs carry the request ID
+        request_id = uuid.uuid4().hex
+        bind_request(request_id, model=model, search_mode=search_mode if enable_web_search else None)
+
+        # Generation runs in the background so a dropped connection can resume it
+        run = stream_registry.start(
+            search_policy.track(event_stream(
+                input_messages, model, enable_web_search=enable_web_search, encoder=encoder,
+                routing=routing, search_mode=search_mode
+            )),
+            encoder,
+            stream_id=request_id
         )
-        response['x-vercel-ai-data-stream'] = 'v1'
+        response = run_response(request, run, 0)
+        if routing is not None:
+            response['x-knowmore-model'] = routing['model']
+            response['x-knowmore-routing'] = routing['reason']
         return response
     except json.JSONDecodeError:
         return StreamingHttpResponse(error_stream('Invalid JSON'), content_type='text/event-stream', status=400)
 
+async def resume_stream(request, stream_id):
+    """Reconnect to a running or recently finished stream, from ?offset= or Last-Event-ID"""
+    run = stream_registry.get(stream_id)
+    if run is None:
+        return StreamingHttpResponse(error_stream('Stream not found or expired'), content_type='text/event-stream', status=404)
+
+    offset = request.GET.get('offset')
+    if offset is None:
+        # Last-Event-ID is the offset of the last frame received
+        last_event_id = request.headers.get('Last-Event-ID')
+        offset = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+    try:
+        offset = int(offset)
+    except ValueError:
+        return StreamingHttpResponse(error_stream('Invalid offset', run.encoder), content_type=run.encoder.content_type, status=400)
+
+    return run_response(request, run, offset)
+
+def run_response(request, run, offset):
+    """Stream a run from ``offset``, compressed when the client accepts it"""
+    body, headers = stream_body(
+        run.subscribe_batches(offset), request.headers.get('Accept-Encoding'), run.remaining_size(offset)
+    )
+    response = StreamingHttpResponse(body, content_type=run.encoder.content_type)
+    for header, value in {**run.encoder.headers, **headers}.items():
+        response[header] = value
+    response['x-knowmore-stream-id'] = run.id
+    return response
+
 def get_models(request):
     """Get available models from all providers"""
     models_dict = AIProviderFactory.get_supported_models()
@@ -57,9 +113,6 @@ def get_models(request):
 def get_manifest(request):
     """Read Vite manifest to get the correct asset paths"""
     try:
-        manifest_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'dist', '.vite', 'manifest.json')
-        with open(manifest_path, 'r') as f:
-            manifest = json.load(f)
-        return JsonResponse(manifest)
+        return JsonResponse(vite_manifest.get())
     except FileNotFoundError:
         return JsonResponse({'error': 'Manifest not found. Please build the frontend first.'}, status=404)
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from .services.web_search_firecrawl import FIRECRAWL_BASE_URL, get_session
+
+logger = logging.getLogger(__name__)
+
+
+def _import_sdks():
+    """Import the provider SDKs in the background so the first request doesn't pay for it"""
+    start = time.perf_counter()
+    import anthropic  # noqa: F401
+    import openai  # noqa: F401
+    import requests  # noqa: F401
+    logger.info("warmup: provider SDKs imported in %.0fms", (time.perf_counter() - start) * 1000)
+
+
+def import_sdks_in_background():
+    """
+    Start importing the SDKs off the event loop. The clients are created lazily
+    on the loop, where a cold ``import anthropic`` would stall every stream for
+    about a second. Makes no outbound calls, so it runs even without warm-up.
+    """
+    threading.Thread(target=_import_sdks, name="knowmore-sdk-import", daemon=True).start()
+
+
+def _connect_firecrawl():
+    get_session().head(FIRECRAWL_BASE_URL, timeout=5)
+
+
+async def _timed(name, coro):
+    start = time.perf_counter()
+    try:
+        await coro
+        logger.info("warmup: %s connected in %.0fms", name, (time.perf_counter() - start) * 1000)
+    except Exception as e:
+        logger.warning("warmup: %s failed: %s", name, e)
+
+
+async def warm_up_connections():
+    """Open pooled connections to the providers on the running event loop"""
+    from .services.claude_service import shared_client as claude_client
+    from .services.openai_service import shared_client as openai_client
+
+    async def claude():
+        await claude_client.get().with_options(max_retries=0).models.list(limit=1)
+
+    async def openai():
+        await openai_client.get().with_options(max_retries=0).models.list()
+
+    # Only providers this worker can actually call
+    tasks = []
+    if os.environ.get("ANTHROPIC_API_KEY"):
+        tasks.append(_timed("anthropic", claude()))
+    if os.environ.get("OPENAI_API_KEY"):
+        tasks.append(_timed("openai", openai()))
+    if os.environ.get("FIRE_CRAWL_API_TOKEN"):
+        tasks.append(_timed("firecrawl", asyncio.to_thread(_connect_firecrawl)))
+    await asyncio.gather(*tasks)
+
+
+class WarmUpMiddleware:
+    """
+    ASGI wrapper that starts connection warm-up as soon as the server loop
+    runs: on lifespan startup where the server supports it (uvicorn), or on
+    the first connection otherwise (daphne).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.started = False
+
+    def _start(self):
+        if not self.started:
+            self.started = True
+            asyncio.get_running_loop().create_task(warm_up_connections())
+
+    async def __call__(self, scope, receive, send):
+        self._start()
+        if scope["type"] == "lifespan":
+            # Django can't handle lifespan scopes itself
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        return await self.app(scope, receive, send)
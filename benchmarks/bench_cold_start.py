@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Cold-start benchmark for a worker process.
+
+Spawns fresh interpreters that load the ASGI application and import the
+views, and reports the median wall time. With ``--importtime`` it also
+prints the slowest modules reported by ``python -X importtime``.
+
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --api-only --importtime
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLD_START = """
+import time
+start = time.perf_counter()
+from Knowmore.asgi import application
+import Knowmore.views
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def _env(api_only):
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "benchmark")
+    env["DJANGO_SETTINGS_MODULE"] = "Knowmore.settings"
+    env["KNOWMORE_API_ONLY"] = "true" if api_only else "false"
+    # Warm-up only runs once the server loop starts, keep it out of the numbers
+    env["KNOWMORE_WARMUP"] = "false"
+    return env
+
+
+def measure(runs, api_only):
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START],
+            cwd=PROJECT_ROOT,
+            env=_env(api_only),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def import_profile(api_only, top):
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", COLD_START],
+        cwd=PROJECT_ROOT,
+        env=_env(api_only),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in output.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if match:
+            rows.append((int(match.group(2)), len(match.group(3)), match.group(4)))
+    # Only report package roots so submodules aren't double counted
+    packages = [row for row in rows if "." not in row[2]]
+    packages.sort(reverse=True)
+    print(f"Slowest package imports (cumulative, top {top}):")
+    for cumulative_us, _, module in packages[:top]:
+        print(f"  {cumulative_us / 1000:>8.1f} ms  {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--api-only", action="store_true", help="Use the slim API-only app config")
+    parser.add_argument("--importtime", action="store_true", help="Print the slowest imports")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    timings = measure(args.runs, args.api_only)
+    label = "api-only" if args.api_only else "full"
+    print(f"Cold start ({label}): median {statistics.median(timings):.0f} ms, "
+          f"min {min(timings):.0f} ms over {args.runs} runs")
+
+    if args.importtime:
+        import_profile(args.api_only, args.top)
+
+
+if __name__ == "__main__":
+    main()
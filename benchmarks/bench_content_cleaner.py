@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Benchmark for the scraped-content cleaning stage.
+
+Reports the size reduction per page, from cleaning and from the passage
+cap separately, and the worst event-loop lag seen by
+a 5ms ticker while a batch of pages is cleaned inline on the loop versus
+in the process pool.
+
+    python benchmarks/bench_content_cleaner.py [--pages 30]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Knowmore.services.content_cleaner import MAX_PASSAGES, ContentCleaner, clean_pages  # noqa: E402
+
+TICK = 0.005
+
+NAV = "\n".join(f"- [Section {i}](https://example.com/section/{i})" for i in range(40))
+BANNER = "We use cookies to improve your experience. [Accept all](https://example.com/cookies)"
+FOOTER = "© 2025 Example Inc. All rights reserved. [Privacy Policy](https://example.com/privacy)"
+
+
+def make_page(i):
+    body = "\n\n".join(
+        f"## Heading {j}\n\n![diagram](https://cdn.example.com/img/{i}-{j}.png)\n\n"
+        f"Paragraph {j} explains [the topic](https://example.com/topic/{j}) in detail. "
+        + "Real content sentence with useful facts and figures. " * 12
+        for j in range(15)
+    )
+    markdown = "\n\n".join([BANNER, NAV, body, NAV, FOOTER])
+    return {"url": f"https://example.com/page/{i}", "title": f"Page {i}", "markdown": markdown}
+
+
+def approx_tokens(chars):
+    return chars / 4
+
+
+async def max_loop_lag(work):
+    """Run ``work`` while a ticker measures how late the loop wakes it up"""
+    worst = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal worst
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            worst = max(worst, time.perf_counter() - start - TICK)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await task
+    return worst, elapsed
+
+
+async def main(page_count):
+    pages = [make_page(i) for i in range(page_count)]
+
+    cleaned = clean_pages(pages)
+    original = sum(page["original_chars"] for page in cleaned)
+    cleaned_chars = sum(page["cleaned_chars"] for page in cleaned)
+    kept = sum(page["kept_chars"] for page in cleaned)
+    print(f"Pages: {page_count}")
+    print(f"  avg tokens/page before:       {approx_tokens(original / page_count):>8.0f}")
+    print(f"  after cleaning:               {approx_tokens(cleaned_chars / page_count):>8.0f} "
+          f"({100 * (1 - cleaned_chars / original):.0f}% less)")
+    print(f"  after the {MAX_PASSAGES}-passage cut:       {approx_tokens(kept / page_count):>8.0f} "
+          f"({100 * (1 - kept / cleaned_chars):.0f}% less than cleaned, "
+          f"{100 * (1 - kept / original):.0f}% less overall)")
+
+    async def inline():
+        clean_pages(pages)
+
+    cleaner = ContentCleaner(max_workers=2)
+    # Start the workers outside the measurement
+    await cleaner.clean(pages[:1])
+
+    async def pooled():
+        await asyncio.gather(*(cleaner.clean([page]) for page in pages))
+
+    for label, work in (("inline on loop", inline), ("process pool", pooled)):
+        lag, elapsed = await max_loop_lag(work)
+        print(f"  {label:<16} max loop lag {lag * 1000:>7.1f} ms, wall {elapsed * 1000:>7.1f} ms")
+
+    cleaner.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=30)
+    asyncio.run(main(parser.parse_args().pages))
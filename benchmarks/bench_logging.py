@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""
+Benchmark for request logging on the event loop.
+
+Simulates the search pipeline logging of many concurrent requests into a
+stderr pipe that is drained slowly (a busy log collector or terminal), and
+reports the worst event-loop lag seen by a 5ms ticker for the old ``print``
+banners versus queue-based logging.
+
+    python benchmarks/bench_logging.py [--requests 200] [--drain-kb 64]
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Knowmore.log import JsonFormatter, QueueingHandler, RequestContextFilter, SamplingFilter, bind_request  # noqa: E402
+
+TICK = 0.005
+QUERIES = ["latest python release notes", "python 3.13 new features", "python release schedule 2025"]
+RESULTS = [
+    {
+        "title": f"Result {i}",
+        "url": f"https://example.com/article/{i}",
+        "description": "A description of the page that goes on for a while. " * 4,
+    }
+    for i in range(3)
+]
+
+
+def slow_pipe(drain_bytes_per_second):
+    """A text stream whose reader drains at a fixed rate, returns (stream, stop)"""
+    read_fd, write_fd = os.pipe()
+    stop = threading.Event()
+
+    def drain():
+        chunk = max(1, drain_bytes_per_second // 100)
+        while not stop.is_set():
+            if not os.read(read_fd, chunk):
+                return
+            time.sleep(0.01)
+        while os.read(read_fd, 65536):
+            pass
+
+    thread = threading.Thread(target=drain, daemon=True)
+    thread.start()
+    stream = io.TextIOWrapper(os.fdopen(write_fd, 'wb'), line_buffering=True)
+
+    def close():
+        stop.set()
+        stream.close()
+        thread.join()
+
+    return stream, close
+
+
+def log_with_print(out):
+    # What execute_multiple_searches used to print per request
+    print("\n" + "=" * 60, file=out)
+    print("🚀 EXECUTING CONCURRENT SEARCHES...", file=out)
+    for i, query in enumerate(QUERIES, 1):
+        print(f"\n📊 Search #{i}: '{query}'", file=out)
+        print("   Status: ✅ Success", file=out)
+        print(f"   Results: {len(RESULTS)} sources found", file=out)
+        for j, res in enumerate(RESULTS, 1):
+            print(f"\n   Result {j}:", file=out)
+            print(f"     Title: {res['title']}", file=out)
+            print(f"     URL: {res['url']}", file=out)
+            print(f"     Preview: {res['description'][:100]}...", file=out)
+    print(f"✨ SEARCH COMPLETE: {len(QUERIES)}/{len(QUERIES)} searches successful", file=out)
+
+
+def make_loggers(out, sample_rate):
+    handler = QueueingHandler(stream=out)
+    handler.setFormatter(JsonFormatter())
+    handler.addFilter(RequestContextFilter())
+    logger = logging.getLogger("bench.search")
+    result_logger = logging.getLogger("bench.search.results")
+    for log, level in ((logger, logging.INFO), (result_logger, logging.DEBUG)):
+        log.handlers[:] = [handler]
+        log.setLevel(level)
+        log.propagate = False
+    result_logger.filters[:] = [RequestContextFilter(), SamplingFilter(sample_rate)]
+    return logger, result_logger, handler
+
+
+def log_with_queue(logger, result_logger):
+    for query in QUERIES:
+        logger.info("search succeeded", extra={"query": query, "source": "firecrawl", "results": len(RESULTS)})
+        for res in RESULTS:
+            result_logger.debug("search result", extra={
+                "query": query, "title": res["title"], "url": res["url"], "preview": res["description"][:100],
+            })
+    logger.info("searches complete", extra={"succeeded": len(QUERIES), "queries": len(QUERIES)})
+
+
+async def run_requests(count, log):
+    async def request(i):
+        bind_request(f"req-{i}", model="claude-sonnet-4-20250514")
+        await asyncio.sleep(0.001 * (i % 20))
+        log()
+
+    await asyncio.gather(*(request(i) for i in range(count)))
+
+
+async def max_loop_lag(work):
+    """Run ``work`` while a ticker measures how late the loop wakes it up"""
+    worst = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal worst
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            worst = max(worst, time.perf_counter() - start - TICK)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await task
+    return worst, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--drain-kb", type=int, default=64, help="log reader throughput in KB/s")
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    args = parser.parse_args()
+    drain = args.drain_kb * 1024
+
+    out, close = slow_pipe(drain)
+    lag, elapsed = asyncio.run(max_loop_lag(lambda: run_requests(args.requests, lambda: log_with_print(out))))
+    close()
+    print(f"print:  max loop lag {lag * 1000:7.1f}ms, {args.requests} requests in {elapsed * 1000:7.1f}ms")
+
+    out, close = slow_pipe(drain)
+    logger, result_logger, handler = make_loggers(out, args.sample_rate)
+    lag, elapsed = asyncio.run(max_loop_lag(
+        lambda: run_requests(args.requests, lambda: log_with_queue(logger, result_logger))
+    ))
+    print(f"queue:  max loop lag {lag * 1000:7.1f}ms, {args.requests} requests in {elapsed * 1000:7.1f}ms"
+          f" ({handler.dropped} records dropped)")
+    handler.close()
+    close()
+
+
+if __name__ == "__main__":
+    main()
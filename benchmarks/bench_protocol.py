@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark for the stream frame encoders.
+
+Measures frames/sec on a single core for the old f-string + json.dumps
+frames and for the encoders in Knowmore.protocol.
+
+    python benchmarks/bench_protocol.py
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Knowmore.protocol import DATA_STREAM, EVENT_STREAM, JSON_BACKEND  # noqa: E402
+
+ITERATIONS = 200_000
+TEXT_DELTA = "The quick brown fox jumps over the lazy dog — \"quoted\" "
+SEARCH_RESULT = {
+    "results": [
+        {
+            "title": f"Result {i}",
+            "url": f"https://example.com/{i}",
+            "description": "Lorem ipsum dolor sit amet " * 4,
+            "markdown": "# Heading\n\nSome scraped content. " * 40,
+        }
+        for i in range(3)
+    ],
+    "filterTags": [],
+    "summary": "Found 3 relevant sources about foxes",
+    "success": True,
+    "query": "foxes",
+}
+
+
+def legacy_text(text):
+    return f'0:{json.dumps(text)}\n'.encode('utf-8')
+
+
+def legacy_tool_result(result):
+    return f'a:{json.dumps({"toolCallId": "search_1", "result": result})}\n'.encode('utf-8')
+
+
+def run(label, fn, arg, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(arg)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {iterations / elapsed:>14,.0f} frames/sec")
+
+
+def main():
+    print(f"JSON backend: {JSON_BACKEND}")
+    print("Text delta frames:")
+    run("legacy f-string", legacy_text, TEXT_DELTA, ITERATIONS)
+    run("data stream encoder", DATA_STREAM.text, TEXT_DELTA, ITERATIONS)
+    run("event stream encoder", EVENT_STREAM.text, TEXT_DELTA, ITERATIONS)
+
+    print("Search result frames:")
+    iterations = ITERATIONS // 20
+    run("legacy f-string", legacy_tool_result, SEARCH_RESULT, iterations)
+    run("data stream encoder", lambda r: DATA_STREAM.tool_result("search_1", r), SEARCH_RESULT, iterations)
+    run("event stream encoder", lambda r: EVENT_STREAM.tool_result("search_1", r), SEARCH_RESULT, iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Benchmark for /api/stream response compression.
+
+Builds a typical search-enabled answer stream (routing and search level
+frames, three web_search tool calls with scraped results, then the answer
+token by token) and reports, per encoding and level, the bytes on the wire
+and the CPU time spent compressing one stream. Every frame is its own
+flushed batch, the worst case for the sync-flush overhead.
+
+    python benchmarks/bench_stream_compression.py [--tokens 600] [--runs 50]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Knowmore.compression import DEFAULT_LEVELS, STREAMS, compress_batches, create_stream  # noqa: E402
+from Knowmore.protocol import DATA_STREAM  # noqa: E402
+
+WORDS = (
+    "The Ioniq 6 offers an EPA estimated range of up to 361 miles and supports 350 kW "
+    "charging, going from 10 to 80 percent in about 18 minutes under ideal conditions. "
+).split()
+LEVELS_TO_TRY = {'gzip': (1, 6, 9), 'br': (1, 4, 8), 'zstd': (1, 3, 9)}
+
+
+def make_frames(tokens):
+    frames = [
+        DATA_STREAM.data([{"type": "stream", "streamId": "0" * 32}]),
+        DATA_STREAM.data([{"type": "searchLevel", "level": 0, "name": "full"}]),
+    ]
+    for i in range(3):
+        call_id = f"search_{i:08x}"
+        query = f"ioniq 6 range and charging speed {2025 + i}"
+        frames += [
+            DATA_STREAM.tool_call_start(call_id, "web_search"),
+            DATA_STREAM.tool_call_delta(call_id, query),
+            DATA_STREAM.tool_call(call_id, "web_search", {"query": query}),
+        ]
+    for i in range(3):
+        results = [
+            {
+                "url": f"https://example.com/reviews/{i}/{j}",
+                "title": f"Review {j}: Hyundai Ioniq 6 long-term test",
+                "description": " ".join(WORDS[:20]),
+                "markdown": "\n\n".join(f"## Section {k}\n\n" + " ".join(WORDS) * 3 for k in range(6)),
+            }
+            for j in range(3)
+        ]
+        frames.append(DATA_STREAM.tool_result(f"search_{i:08x}", {
+            "results": results, "filterTags": [], "success": True,
+            "summary": "Found 3 relevant sources", "query": f"query {i}", "source": "firecrawl",
+        }))
+    frames += [DATA_STREAM.text(WORDS[i % len(WORDS)] + " ") for i in range(tokens)]
+    frames.append(DATA_STREAM.finish())
+    return frames
+
+
+async def batches(frames):
+    for frame in frames:
+        yield [frame]
+
+
+async def compressed_size(frames, encoding, level):
+    size = 0
+    async for chunk in compress_batches(batches(frames), create_stream(encoding, level)):
+        size += len(chunk)
+    return size
+
+
+def compress(frames, encoding, level):
+    stream = create_stream(encoding, level)
+    for frame in frames:
+        stream.compress(frame)
+    stream.finish()
+
+
+def measure(frames, encoding, level, runs):
+    size = asyncio.run(compressed_size(frames, encoding, level))
+    start = time.process_time()
+    for _ in range(runs):
+        compress(frames, encoding, level)
+    return size, (time.process_time() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=600)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    frames = make_frames(args.tokens)
+    raw = sum(len(frame) for frame in frames)
+    answer = sum(len(frame) for frame in frames if frame.startswith(b'0:'))
+    print(f"stream: {len(frames)} frames, {raw} bytes ({answer} in text frames)\n")
+    print(f"{'encoding':<10}{'level':>6}{'bytes':>10}{'saved':>8}{'text only':>11}{'cpu/stream':>12}")
+    text_frames = [frame for frame in frames if frame.startswith(b'0:')]
+    for encoding, levels in LEVELS_TO_TRY.items():
+        if encoding not in STREAMS:
+            print(f"{encoding:<10}  not installed")
+            continue
+        for level in levels:
+            size, cpu = measure(frames, encoding, level, args.runs)
+            text_size = asyncio.run(compressed_size(text_frames, encoding, level))
+            default = '*' if DEFAULT_LEVELS[encoding] == level else ' '
+            print(f"{encoding:<10}{level:>5}{default}{size:>10}{1 - size / raw:>8.0%}"
+                  f"{1 - text_size / answer:>11.0%}{cpu * 1000:>10.2f}ms")
+    print("\n* default level. 'text only' is the saving on the answer's token frames alone.")
+
+
+if __name__ == "__main__":
+    main()
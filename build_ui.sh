@@ -33,6 +33,14 @@ if [ $? -ne 0 ]; then
 fi
 echo "✅ npm run build"
 
+# Precompress bundles so they can be served with gzip/brotli directly
+echo "🗜️  Precompressing assets..."
+cd "$PROJECT_ROOT" && python3 -m Knowmore.assets "$PROJECT_ROOT/static/dist"
+if [ $? -ne 0 ]; then
+    echo "❌ Error precompressing assets"
+    exit 1
+fi
+
 # Check if build was successful
 DIST_DIR="$PROJECT_ROOT/static/dist"
 if [ -d "$DIST_DIR" ]; then
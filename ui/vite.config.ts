@@ -14,6 +14,7 @@ export default defineConfig({
     outDir: '../static/dist',
     assetsDir: 'assets',
     emptyOutDir: true,
+    manifest: true,
     rollupOptions: {
       output: {
         entryFileNames: 'assets/[name]-[hash].js',